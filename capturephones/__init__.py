@@ -0,0 +1,31 @@
+"""
+Captura os telefones dos estabelecimentos do PlugShare por cidade.
+
+Os módulos são carregados sob demanda: `import capturephones` não importa o
+Selenium nem o requests, e nomes como `capturephones.CityStore` só carregam o
+módulo de origem no primeiro acesso. A linha de comando fica em
+`python -m capturephones` (veja `cli.py`).
+"""
+import importlib
+
+# Nome público -> módulo do pacote que o define
+_LAZY = {
+    "CityStore": "cityStore",
+    "city_files": "cityStore",
+    "load_city": "cityStore",
+    "station_key": "cityStore",
+    "normalize_numbers": "phoneNormalize",
+    "StationIndex": "stationIndex",
+    "StationLookup": "lookupService",
+    "export_cities": "columnarExport",
+    "load_stations": "columnarExport",
+    "metrics": "runMetrics",
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
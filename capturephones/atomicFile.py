@@ -0,0 +1,22 @@
+import os
+
+
+def write_atomic(path, data):
+    """
+    Grava `data` em um arquivo temporário, com fsync, e substitui o destino de uma
+    vez: quem lê o arquivo vê o conteúdo antigo ou o novo, nunca um pela metade.
+
+    `data` pode ser str, bytes ou uma sequência de partes (str ou bytes), gravadas em ordem.
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    parts = [data] if isinstance(data, (str, bytes)) else data
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for part in parts:
+            f.write(part.encode("utf-8") if isinstance(part, str) else part)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
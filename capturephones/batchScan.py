@@ -0,0 +1,299 @@
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing.util import Finalize
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from .regionCapture import RegionCapture
+from .cityList import read_city_list
+from .regionQuery import region_url_for_bbox, region_fetcher, fetch_region
+from .regionStream import has_establishments, iter_establishments
+from .regionTiler import region_cap, tile_region, expand_region
+from .detailFetch import create_session, get_cookies_from_browser
+from .driverPool import DriverPool, available_memory_mb
+from .cityStore import FOLDER_NAME, city_filename
+from .checkpoint import Checkpoint
+from .replayHarness import Recorder
+from .resourcePolicy import policy_from_args
+from .runMetrics import metrics, run_profiled
+from .scanOptions import add_scan_arguments, write_run_reports
+from .scanner import PLUGSHARE_URL, plugshare_cookies, setup_driver, process_city
+
+
+# Segundos sem novas respostas `locations/region` para considerar o mapa parado na cidade
+REGION_QUIET = 2.0
+
+
+def search_city(driver, capture, city_name, timeout=20, policy=None):
+    """
+    Pesquisa a cidade na página do PlugShare e captura a resposta `locations/region`
+    gerada. Retorna o corpo bruto da resposta, ou None se nenhum estabelecimento veio.
+    """
+    if policy is not None:
+        policy.apply(driver, "search")
+    driver.get(PLUGSHARE_URL)
+    search_box = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, 'input[type="search"]'))
+    )
+    capture.reset()
+
+    search_box.clear()
+    search_box.send_keys(city_name)
+    try:
+        # Seleciona a primeira sugestão de cidade, como o usuário faria
+        WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "a[data-testid='location-link']"))
+        ).click()
+    except Exception:
+        search_box.send_keys(Keys.RETURN)
+
+    # Fica com a última resposta depois que o mapa para de se mover, como o usuário faria ao clicar em "Continuar"
+    body = capture.wait_for_latest_body(timeout, quiet=REGION_QUIET)
+    return body if has_establishments(body) else None
+
+
+def capture_city(driver, city_name, bbox, template, args, recorder=None):
+    """
+    Obtém os estabelecimentos de uma cidade da lista: pela URL modelo, quando a linha
+    traz bbox, ou pesquisando o nome no PlugShare.
+
+    Retorna (estabelecimentos, template), com os estabelecimentos em lista ou no
+    corpo bruto de `locations/region` (None se nada veio) e a URL modelo de `locations/region` a usar nas
+    próximas linhas com bbox.
+    """
+    if bbox:
+        if not template:
+            print("⚠️ Sem URL modelo de `locations/region` para o bbox; informe --region-template. Pulando...")
+            return None, template
+        session = create_session(plugshare_cookies(driver))
+        with metrics.stage("region_fetch"):
+            if args.tile:
+                establishments = tile_region(session, template, bbox, region_cap(template, args.tile_cap),
+                                             max_rate=args.max_rate)
+            else:
+                establishments = fetch_region(session, region_url_for_bbox(template, bbox),
+                                              region_fetcher(session, args.max_rate))
+        return establishments, template
+
+    capture = RegionCapture(driver, recorder=recorder)
+    with metrics.stage("region_capture"):
+        establishments = search_city(driver, capture, city_name, policy=policy_from_args(args))
+    template = template or capture.latest_url
+    if args.tile and establishments is not None:
+        session = create_session(get_cookies_from_browser(driver))
+        with metrics.stage("region_fetch"):
+            establishments = expand_region(session, capture.latest_url, list(iter_establishments(establishments)),
+                                           args.tile_cap, args.max_rate)
+    return establishments, template
+
+
+def scan_job(driver, city_name, bbox, template, args, recorder=None):
+    """
+    Processa uma cidade da lista com o navegador recebido.
+
+    Retorna (processou, template): se a cidade foi salva e a URL modelo de
+    `locations/region` a usar nas próximas linhas com bbox.
+    """
+    if args.resume and Checkpoint(city_name).exists():
+        process_city(driver, city_name, None, args, recorder)
+        return True, template
+
+    establishments, template = capture_city(driver, city_name, bbox, template, args, recorder)
+    if not establishments:
+        print(f"❌ Nenhum estabelecimento encontrado para {city_name}.")
+        return False, template
+
+    if isinstance(establishments, list):
+        print(f"✅ {len(establishments)} estabelecimentos encontrados.")
+    process_city(driver, city_name, establishments, args, recorder)
+    return True, template
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Varre em lote (sem interação) uma lista de cidades do PlugShare.")
+    parser.add_argument("city_list", help="arquivo com uma cidade (ou cidade; bbox) por linha")
+    parser.add_argument("--show", action="store_true",
+                        help="mostra o navegador em vez de rodar em modo headless")
+    parser.add_argument("--region-template",
+                        help="URL `locations/region` usada como modelo para as linhas com bbox "
+                             "(por padrão, a primeira capturada por pesquisa)")
+    parser.add_argument("--max-pages", type=int, default=300,
+                        help="recicla o navegador depois deste número de páginas")
+    parser.add_argument("--max-memory-mb", type=float, default=1500,
+                        help="recicla o navegador quando ele passar deste uso de memória (0 = não verifica)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="processos em paralelo, cada um com o próprio navegador (0 = um por núcleo); "
+                             "limitado pela memória livre, contando --max-memory-mb por navegador")
+    add_scan_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def run_jobs(jobs, pool, args, recorder=None):
+    """Processa as cidades da lista em sequência, reaproveitando os navegadores do pool."""
+    template = args.region_template
+    done = 0
+
+    for city_name, bbox in jobs:
+        print(f"🏙️ Cidade: {city_name}")
+        try:
+            with metrics.stage("city"), pool.lease() as driver:
+                processed, template = scan_job(driver, city_name, bbox, template, args, recorder)
+            done += processed
+            metrics.count("cities_done" if processed else "cities_empty")
+        except Exception as e:
+            metrics.count("cities_failed")
+            print(f"❌ Falha ao processar {city_name}: {e}")
+
+    print(f"✅ Lote concluído: {done}/{len(jobs)} cidades processadas.")
+    return done
+
+
+def estimate_city_size(city_name, folder=FOLDER_NAME):
+    """Tamanho em bytes dos arquivos já salvos da cidade (estimativa do custo da varredura), ou None se ela nunca foi varrida."""
+    paths = [city_filename(city_name, folder, ext) for ext in (".json", ".jsonl")]
+    sizes = [os.path.getsize(path) for path in paths if os.path.exists(path)]
+    return sum(sizes) if sizes else None
+
+
+def order_jobs(jobs, folder=FOLDER_NAME):
+    """
+    Ordena as cidades da maior para a menor, para equilibrar a carga entre os
+    processos; as nunca varridas vêm antes (varredura completa, sem diff).
+
+    Cidades repetidas na lista são descartadas: cada cidade fica com um único
+    processo, o único que escreve em `numPerCity/<cidade>.json`.
+    """
+    unique = {}
+    for city_name, bbox in jobs:
+        unique.setdefault(city_name, (city_name, bbox))
+    sizes = {city_name: estimate_city_size(city_name, folder) for city_name in unique}
+    return sorted(unique.values(), key=lambda job: (sizes[job[0]] is not None, -(sizes[job[0]] or 0)))
+
+
+def plan_processes(requested, browser_mb):
+    """Quantos processos rodar: o pedido (0 = um por núcleo), limitado à memória livre para `browser_mb` por navegador."""
+    processes = requested or os.cpu_count() or 1
+    available = available_memory_mb()
+    if browser_mb and available is not None:
+        limit = max(1, int(available // browser_mb))
+        if limit < processes:
+            print(f"⚠️ Memória livre ({available:.0f} MB) só comporta {limit} navegadores; usando {limit} processos.")
+            processes = limit
+    return processes
+
+
+# Estado de cada processo do lote em paralelo (pool de navegadores, gravador e opções)
+_worker = {}
+
+
+def _init_worker(args):
+    pool = DriverPool(lambda: setup_driver(headless=not args.show),
+                      max_pages=args.max_pages, max_memory_mb=args.max_memory_mb)
+    recorder = Recorder(args.record) if args.record else None
+    _worker.update(args=args, pool=pool, recorder=recorder)
+    # Os processos filhos não rodam o atexit; o Finalize fecha os navegadores quando o processo termina
+    Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker():
+    _worker["pool"].close()
+    if _worker["recorder"] is not None:
+        _worker["recorder"].close()
+
+
+def _run_job(job, template):
+    """Processa uma cidade dentro de um processo do lote. Retorna (cidade, situação, template, métricas)."""
+    city_name, bbox = job
+    print(f"🏙️ [{os.getpid()}] Cidade: {city_name}")
+    status = "failed"
+    try:
+        with metrics.stage("city"), _worker["pool"].lease() as driver:
+            processed, template = scan_job(driver, city_name, bbox, template, _worker["args"], _worker["recorder"])
+        status = "done" if processed else "empty"
+    except Exception as e:
+        print(f"❌ Falha ao processar {city_name}: {e}")
+    metrics.count(f"cities_{status}")
+    return city_name, status, template, metrics.drain()
+
+
+def run_parallel(jobs, args, processes):
+    """
+    Distribui as cidades entre `processes` processos, cada um com seus navegadores,
+    das maiores para as menores. As métricas de cada cidade voltam para este
+    processo e entram no relatório único da execução.
+
+    Linhas com bbox precisam da URL modelo de `locations/region`: sem
+    --region-template, elas esperam a primeira cidade pesquisada trazer uma.
+    """
+    jobs = order_jobs(jobs)
+    template = args.region_template
+    waiting = [job for job in jobs if job[1] and not template]
+    ready = [job for job in jobs if job not in waiting]
+    done = 0
+    print(f"🚀 {len(jobs)} cidades em {processes} processos.")
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(processes, mp_context=context, initializer=_init_worker, initargs=(args,)) as executor:
+        # A fila do executor é FIFO: as cidades saem na ordem (maiores primeiro)
+        futures = {executor.submit(_run_job, job, template) for job in ready}
+        while futures:
+            finished, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                try:
+                    city_name, status, job_template, data = future.result()
+                except Exception as e:
+                    metrics.count("cities_failed")
+                    print(f"❌ Um processo do lote falhou: {e}")
+                    continue
+                metrics.merge(data)
+                done += status == "done"
+                template = template or job_template
+            if template and waiting:
+                futures |= {executor.submit(_run_job, job, template) for job in waiting}
+                waiting = []
+
+    for city_name, _ in waiting:
+        metrics.count("cities_empty")
+        print(f"⚠️ Sem URL modelo de `locations/region` para o bbox de {city_name}; informe --region-template. Pulando...")
+
+    print(f"✅ Lote concluído: {done}/{len(jobs)} cidades processadas.")
+    return done
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = read_city_list(args.city_list)
+    print(f"📋 {len(jobs)} cidades na fila.")
+
+    processes = plan_processes(args.processes, args.max_memory_mb or 1500) if args.processes != 1 else 1
+    if processes > 1:
+        try:
+            if args.profile:
+                run_profiled(run_parallel, args.profile, jobs, args, processes)
+            else:
+                run_parallel(jobs, args, processes)
+        finally:
+            write_run_reports(args)
+        return
+
+    pool = DriverPool(lambda: setup_driver(headless=not args.show),
+                      max_pages=args.max_pages, max_memory_mb=args.max_memory_mb)
+    recorder = Recorder(args.record) if args.record else None
+
+    try:
+        if args.profile:
+            run_profiled(run_jobs, args.profile, jobs, pool, args, recorder)
+        else:
+            run_jobs(jobs, pool, args, recorder)
+    finally:
+        pool.close()
+        if recorder is not None:
+            recorder.close()
+        write_run_reports(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .detailFetch import create_session
+from .replayHarness import ReplayServer
+from .runMetrics import metrics, summarize
+from .scanOptions import EXTRACTOR_NAMES
+
+PATHS = ("api", "dom")
+
+
+def peak_rss_mb():
+    """Pico de memória residente deste processo e dos filhos já encerrados (ex.: Chrome), em MB."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return {"self": round(own, 1), "children": round(children, 1)}
+
+
+def load_regions(region_urls):
+    """Busca no servidor de replay os corpos brutos das respostas `locations/region` gravadas."""
+    session = create_session()
+    bodies = []
+    for region_url in region_urls:
+        with metrics.stage("region"):
+            bodies.append(session.get(region_url).content)
+    return bodies
+
+
+def run_path(path, region_urls, args):
+    """
+    Roda um caminho do scanner de ponta a ponta (`process_city`, com o Chrome
+    headless) sobre as regiões gravadas: cada resposta `locations/region` vira uma
+    cidade, processada numa pasta temporária (sem índice, cache nem checkpoint
+    de execuções anteriores).
+
+    Executado num processo novo por rodada, para que o pico de RSS seja só deste
+    caminho. Retorna (estações, segundos, amostras por etapa, pico de RSS).
+    """
+    from .scanner import parse_args, process_city, setup_driver
+
+    scan_args = parse_args(["--mode", path, "--extract", args.extract, "--tabs", str(args.tabs),
+                            "--workers", str(args.workers), "--max-rate", str(args.max_rate)])
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        metrics.reset()
+        driver = setup_driver(headless=True)
+        start = time.perf_counter()
+        try:
+            for number, body in enumerate(load_regions(region_urls), 1):
+                process_city(driver, f"bench_{path}_{number}", body, scan_args)
+        finally:
+            driver.quit()
+            os.chdir(cwd)
+        elapsed = time.perf_counter() - start
+
+    data = metrics.drain()
+    stations = data["counters"].get("phones_found", 0) + data["counters"].get("phones_missing", 0)
+    return stations, elapsed, data["stages"], peak_rss_mb()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline dos caminhos de extração usando fixtures gravadas.")
+    parser.add_argument("fixtures", help="pasta gravada com --record")
+    parser.add_argument("--paths", default="api", help="caminhos a medir, separados por vírgula (api, dom); ambos usam o Chrome headless")
+    parser.add_argument("--repeat", type=int, default=1, help="quantas vezes rodar cada caminho")
+    parser.add_argument("--latency", type=float, default=0.0, help="atraso simulado por resposta, em segundos")
+    parser.add_argument("--extract", choices=EXTRACTOR_NAMES, default="observer",
+                        help="estratégia de extração do telefone no caminho dom")
+    parser.add_argument("--tabs", type=int, default=1, help="abas carregando páginas de detalhes ao mesmo tempo")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-rate", type=float, default=0, help="limite de requisições por segundo (0 = sem limite)")
+    parser.add_argument("--json", metavar="ARQUIVO", help="grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    paths = [path.strip() for path in args.paths.split(",")]
+    for path in paths:
+        if path not in PATHS:
+            parser.error(f"caminho desconhecido: {path}")
+
+    report = []
+    with ReplayServer(args.fixtures, latency=args.latency) as server:
+        region_urls = [server.local_url(url) for url in server.urls("region")]
+        for path in paths:
+            for run in range(args.repeat):
+                # Um processo por rodada: o pico de RSS (ru_maxrss) não carrega o das rodadas anteriores
+                with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    stations, elapsed, stages, peak = executor.submit(run_path, path, region_urls, args).result()
+                result = {
+                    "path": path,
+                    "run": run + 1,
+                    "stations": stations,
+                    "seconds": round(elapsed, 3),
+                    "stations_per_second": round(stations / elapsed, 2) if elapsed else None,
+                    "stages": {name: summarize(samples) for name, samples in stages.items()},
+                    "peak_rss_mb": peak,
+                }
+                report.append(result)
+
+                print(f"⏱️ {result['path']} #{result['run']}: {stations} estações em {elapsed:.2f}s "
+                      f"({result['stations_per_second']} estações/s), pico de RSS {result['peak_rss_mb']} MB")
+                for name, summary in result["stages"].items():
+                    if summary["count"]:
+                        print(f"   {name:<13} n={summary['count']:<5} p50={summary['p50'] * 1000:8.1f}ms "
+                              f"p90={summary['p90'] * 1000:8.1f}ms p99={summary['p99'] * 1000:8.1f}ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"💾 Relatório salvo em `{args.json}`.")
+
+
+if __name__ == "__main__":
+    main()
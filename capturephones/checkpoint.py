@@ -0,0 +1,103 @@
+import json
+import os
+from .atomicFile import write_atomic
+from .cityStore import FOLDER_NAME, city_filename
+from .regionStream import iter_establishments
+
+# Pasta dos checkpoints das varreduras em andamento
+CHECKPOINT_FOLDER = os.path.join(FOLDER_NAME, ".checkpoints")
+
+DEFAULT_BATCH_SIZE = 25
+
+
+class Checkpoint:
+    """
+    Checkpoint de uma varredura de cidade, para retomar depois de uma queda do
+    Chrome ou do processo.
+
+    Guarda dois arquivos em `numPerCity/.checkpoints/`:
+      - `<cidade>.json`: o corpo bruto capturado de `locations/region` (gravado uma
+        vez, como veio); os estabelecimentos são lidos dele em stream, na varredura
+        e na retomada;
+      - `<cidade>.done`: as chaves das estações já salvas, uma por linha, gravadas
+        em lotes de `batch_size` com fsync.
+
+    Uma queda perde no máximo um lote: as estações dele são processadas de novo
+    na retomada.
+    """
+
+    def __init__(self, city, folder=CHECKPOINT_FOLDER, batch_size=DEFAULT_BATCH_SIZE):
+        self.city = city
+        self.batch_size = batch_size
+        self.path = city_filename(city, folder)
+        self.done_path = city_filename(city, folder, ".done")
+        self._pending = []
+        self._file = None
+        os.makedirs(folder, exist_ok=True)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def start(self, payload):
+        """
+        Grava o payload de uma varredura nova (descartando o checkpoint anterior) e
+        devolve os estabelecimentos.
+
+        Um corpo bruto de `locations/region` (str/bytes) é gravado como veio e os
+        estabelecimentos saem dele em stream (regionStream.iter_establishments);
+        uma lista (ex.: tiles) é gravada como array JSON e devolvida.
+        """
+        if isinstance(payload, (str, bytes)):
+            body, establishments = payload, iter_establishments(payload)
+        else:
+            establishments = list(payload)
+            body = json.dumps(establishments, ensure_ascii=False)
+        write_atomic(self.path, body)
+        self._file = open(self.done_path, "w", encoding="utf-8")
+        return establishments
+
+    def resume(self):
+        """Reabre o checkpoint existente. Retorna (estabelecimentos em stream, chaves já processadas)."""
+        with open(self.path, "rb") as f:
+            establishments = iter_establishments(f.read())
+
+        done = set()
+        if os.path.exists(self.done_path):
+            with open(self.done_path, "r", encoding="utf-8") as f:
+                # Uma última linha sem "\n" é uma escrita interrompida: ignora
+                done = {line[:-1] for line in f if line.endswith("\n")}
+
+        self._file = open(self.done_path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline():
+            self._file.write("\n")
+        return establishments, done
+
+    def _ends_with_newline(self):
+        with open(self.done_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def mark(self, key):
+        """Registra uma estação como processada. Retorna True quando um lote completo está pendente."""
+        self._pending.append(key)
+        return len(self._pending) >= self.batch_size
+
+    def flush(self):
+        """Grava em disco as chaves pendentes (chame depois de sincronizar o journal da cidade)."""
+        if not self._pending or self._file is None:
+            return
+        self._file.write("".join(f"{key}\n" for key in self._pending))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending.clear()
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+    def finish(self):
+        """Remove o checkpoint depois que a cidade foi concluída e compactada."""
+        self.close()
+        for path in (self.path, self.done_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,22 @@
+from .regionQuery import parse_bbox
+
+
+def read_city_list(path):
+    """
+    Lê o arquivo com a lista de cidades. Cada linha não vazia é um de:
+
+        Santa Maria
+        Santa Maria; -29.78,-53.90,-29.62,-53.70
+
+    O segundo formato informa o bounding box (sul,oeste,norte,leste) em vez de
+    pesquisar o nome no PlugShare. Linhas começando com `#` são ignoradas.
+    """
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, _, bbox = line.partition(";")
+            jobs.append((name.strip(), parse_bbox(bbox) if bbox.strip() else None))
+    return jobs
@@ -0,0 +1,353 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from .atomicFile import write_atomic
+from .regionStream import coordinates
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, o modo compartilhado fica indisponível
+    fcntl = None
+
+# Nome da pasta onde serão salvos os arquivos JSON
+FOLDER_NAME = "numPerCity"
+
+# Políticas de fsync aceitas pelo journal:
+#   "always" -> fsync a cada registro (mais seguro, mais lento)
+#   "batch"  -> fsync a cada `batch_size` registros e no fechamento
+#   "never"  -> apenas flush; o sistema operacional decide quando gravar no disco
+FSYNC_POLICIES = ("always", "batch", "never")
+
+
+def city_filename(city, folder=FOLDER_NAME, ext=".json"):
+    """Retorna o caminho do arquivo da cidade dentro da pasta de resultados."""
+    return os.path.join(folder, f"{city.replace(' ', '_')}{ext}")
+
+
+def write_json_atomic(path, data):
+    """Grava `data` como JSON, substituindo o destino de forma atômica (atomicFile.write_atomic)."""
+    write_atomic(path, json.dumps(data, ensure_ascii=False, indent=4))
+
+
+def station_key(record):
+    """Chave estável de um estabelecimento: o id do PlugShare ou, na falta dele, a URL."""
+    if record.get("id") is not None:
+        return f"id:{record['id']}"
+    if record.get("url"):
+        return f"url:{record['url']}"
+    return None
+
+
+class StationDiff:
+    """
+    Compara, em fluxo, o payload novo de `locations/region` com as estações já
+    salvas (o resultado de `CityStore.stations()`).
+
+    `filter(establishments)` aceita um gerador e devolve, à medida que lê, os
+    estabelecimentos novos, com nome alterado ou com coordenadas que ainda não
+    estavam salvas (ou que mudaram). Depois que o fluxo termina,
+    `removed()` lista as chaves das estações que sumiram do payload e `revived`
+    as das estações marcadas como obsoletas que voltaram a aparecer.
+
+    `changed` guarda as chaves (`station_key` do payload) das estações já salvas que
+    mudaram de nome ou de posição: o telefone delas deve ser buscado de novo, sem
+    o índice global. Ganhar coordenadas que não estavam salvas não conta como mudança.
+    """
+
+    def __init__(self, stations):
+        self.stations = stations
+        self.aliases = {
+            f"url:{record['url']}": key for key, record in stations.items() if record.get("url")
+        }
+        self.seen = set()
+        self.changed = set()
+        self.revived = []
+        self.added_count = 0
+
+    def filter(self, establishments):
+        for est in establishments:
+            key = station_key(est)
+            if key not in self.stations and est.get("url"):
+                key = self.aliases.get(f"url:{est['url']}", key)
+
+            record = self.stations.get(key)
+            # Continua no payload: não é removida, mesmo que volte para ser salva de novo
+            self.seen.add(key)
+            coords = coordinates(est)
+            if record is None:
+                self.added_count += 1
+                yield est
+                continue
+            changed = record.get("name") != est.get("name") or any(
+                record.get(field) not in (None, value) for field, value in coords.items()
+            )
+            if changed:
+                self.changed.add(station_key(est))
+            # Coordenadas que ainda não estavam salvas: grava de novo, mas o telefone continua valendo
+            if changed or any(record.get(field) is None for field in coords):
+                self.added_count += 1
+                yield est
+                continue
+            if record.get("stale"):
+                self.revived.append(key)
+
+    def removed(self):
+        return [
+            key for key, record in self.stations.items()
+            if key not in self.seen and not key.startswith("row:") and not record.get("stale")
+        ]
+
+
+def records_from_json(data):
+    """Converte um arquivo de cidade no formato {"city", "establishments", "numbers", ...} em registros de journal."""
+    names = data.get("establishments", [])
+    phones = data.get("numbers", [])
+    ids = data.get("ids") or [None] * len(names)
+    urls = data.get("urls") or [None] * len(names)
+    stale = data.get("stale") or [False] * len(names)
+    lats = data.get("lats") or [None] * len(names)
+    lngs = data.get("lngs") or [None] * len(names)
+
+    for name, phone, est_id, url, is_stale, lat, lng in zip(names, phones, ids, urls, stale, lats, lngs):
+        record = {"name": name, "phone": phone}
+        if est_id is not None:
+            record["id"] = est_id
+        if url:
+            record["url"] = url
+        if lat is not None and lng is not None:
+            record["lat"], record["lng"] = lat, lng
+        yield record
+        if is_stale and station_key(record):
+            yield {"op": "stale", "key": station_key(record), "stale": True}
+
+
+def read_journal(path):
+    """Lê os registros de um journal, ignorando linhas incompletas ou corrompidas."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except Exception:
+                continue
+
+
+def replay_journal(records):
+    """
+    Reconstrói o estado atual das estações a partir dos registros: {chave: registro}.
+
+    Registros antigos, sem id nem URL, recebem a chave `row:<n>` e são
+    substituídos pelo primeiro registro com chave que tenha o mesmo nome;
+    registros só com URL são substituídos pelo registro com id da mesma URL.
+    """
+    stations = {}
+    legacy_by_name = {}
+
+    for n, record in enumerate(records):
+        if record.get("op") == "stale":
+            if record.get("key") in stations:
+                stations[record["key"]]["stale"] = record.get("stale", True)
+            continue
+
+        key = station_key(record)
+        if key is None:
+            key = f"row:{n}"
+            legacy_by_name.setdefault(record.get("name"), []).append(key)
+        else:
+            legacy = legacy_by_name.get(record.get("name"))
+            if legacy:
+                stations.pop(legacy.pop(0), None)
+            if key.startswith("id:") and record.get("url"):
+                stations.pop(f"url:{record['url']}", None)
+
+        record["stale"] = False
+        stations.pop(key, None)
+        stations[key] = record
+
+    return stations
+
+
+def load_city(json_path):
+    """
+    Lê uma cidade sem abrir o journal para escrita. Retorna (cidade, estações).
+
+    Usa o journal `<cidade>.jsonl` quando existir (tem id, URL, origem e horário de
+    cada registro); senão, converte as listas do próprio `<cidade>.json`.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    city = data.get("city") or os.path.splitext(os.path.basename(json_path))[0].replace("_", " ")
+
+    journal_path = os.path.splitext(json_path)[0] + ".jsonl"
+    if os.path.exists(journal_path):
+        return city, replay_journal(read_journal(journal_path))
+    return city, replay_journal(records_from_json(data))
+
+
+def city_files(folder=FOLDER_NAME):
+    """Lista os arquivos `<cidade>.json` da pasta de resultados (ignora arquivos internos, que começam com ".")."""
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.endswith(".json") and not name.startswith(".")
+    )
+
+
+class CityStore:
+    """
+    Armazena os resultados de uma cidade em um journal append-only (JSON Lines).
+
+    Cada estabelecimento salvo vira uma única linha em `numPerCity/<cidade>.jsonl`,
+    então o custo de salvar não cresce com o tamanho da cidade. O arquivo
+    `numPerCity/<cidade>.json`, no formato já usado pelos outros scripts:
+
+    {
+        "city": "Nome_da_Cidade",
+        "establishments": ["Estabelecimento 1", ...],
+        "numbers": ["Telefone 1", ...]
+    }
+
+    é gerado a partir do journal por `compact()`, junto com as listas paralelas
+    `ids`, `urls`, `stale`, `lats` e `lngs` (coordenadas; None quando não vieram). O journal é a fonte da verdade: a compactação pode ser
+    repetida quantas vezes for preciso e mantém só o registro mais recente de cada
+    estação (chave `station_key`).
+
+    Com `shared=True`, vários processos (ou máquinas, numa pasta compartilhada) podem
+    escrever na mesma cidade: cada escrita e cada compactação segura um `flock`
+    exclusivo no journal.
+    """
+
+    def __init__(self, city, folder=FOLDER_NAME, fsync="batch", batch_size=50, shared=False):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync inválida: {fsync!r} (use uma de {FSYNC_POLICIES})")
+        if shared and fcntl is None:
+            raise RuntimeError("O modo compartilhado do CityStore precisa de flock (Linux/macOS).")
+
+        self.city = city
+        self.folder = folder
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.shared = shared
+        self.json_path = city_filename(city, folder)
+        self.journal_path = city_filename(city, folder, ".jsonl")
+        self._unsynced = 0
+
+        os.makedirs(folder, exist_ok=True)
+        self._seed_from_json()
+        self._file = open(self.journal_path, "a", encoding="utf-8")
+        with self._locked():
+            self._repair_tail()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _seed_from_json(self):
+        """Migra um arquivo JSON antigo (criado antes do journal) para o journal."""
+        if os.path.exists(self.journal_path) or not os.path.exists(self.json_path):
+            return
+
+        try:
+            with open(self.json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+
+        write_atomic(self.journal_path,
+                     (json.dumps(record, ensure_ascii=False) + "\n" for record in records_from_json(data)))
+
+    @contextmanager
+    def _locked(self):
+        """Trava o journal para os outros processos enquanto o bloco roda (só no modo compartilhado)."""
+        if not self.shared:
+            yield
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _repair_tail(self):
+        """Garante que o journal termine em quebra de linha (caso o processo tenha morrido no meio de uma escrita)."""
+        if os.fstat(self._file.fileno()).st_size == 0:
+            return
+        with open(self.journal_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            last_byte = f.read(1)
+        if last_byte != b"\n":
+            self._file.write("\n")
+            self._file.flush()
+
+    def append(self, name, phone, **fields):
+        """Acrescenta um registro ao journal, aplicando a política de fsync configurada."""
+        record = {"name": name, "phone": phone, "ts": time.time()}
+        record.update(fields)
+        self._write(record)
+
+    def mark_stale(self, keys, stale=True):
+        """Marca (ou desmarca) como obsoletas as estações que sumiram do payload da região."""
+        for key in keys:
+            self._write({"op": "stale", "key": key, "stale": stale, "ts": time.time()})
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._locked():
+            self._file.write(line)
+            self._file.flush()
+        self._unsynced += 1
+
+        if self.fsync == "always" or (self.fsync == "batch" and self._unsynced >= self.batch_size):
+            self.sync()
+
+    def sync(self):
+        """Força a gravação em disco dos registros pendentes."""
+        if self._file.closed:
+            return
+        self._file.flush()
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def records(self):
+        """Lê os registros do journal, ignorando linhas incompletas ou corrompidas."""
+        return read_journal(self.journal_path)
+
+    def stations(self):
+        """Estado atual das estações da cidade: {chave: registro} (veja `replay_journal`)."""
+        return replay_journal(self.records())
+
+    def compact(self):
+        """Gera `numPerCity/<cidade>.json` a partir do journal, de forma atômica."""
+        self.sync()
+
+        data = {"city": self.city, "establishments": [], "numbers": [], "ids": [], "urls": [], "stale": [],
+                "lats": [], "lngs": []}
+        with self._locked():
+            stations = self.stations()
+        for record in stations.values():
+            data["establishments"].append(record.get("name"))
+            data["numbers"].append(record.get("phone"))
+            data["ids"].append(record.get("id"))
+            data["urls"].append(record.get("url"))
+            data["stale"].append(record["stale"])
+            data["lats"].append(record.get("lat"))
+            data["lngs"].append(record.get("lng"))
+
+        write_json_atomic(self.json_path, data)
+        return self.json_path
+
+    def close(self):
+        """Sincroniza e fecha o journal."""
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
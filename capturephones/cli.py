@@ -0,0 +1,40 @@
+import importlib
+import sys
+
+# Subcomando -> (módulo do pacote, argumentos fixos, descrição). Cada módulo só é
+# importado quando o subcomando roda, então `export` e `normalize` não carregam o Selenium.
+COMMANDS = {
+    "dom": ("scanner", [], "varredura interativa de uma cidade, abrindo as páginas no Chrome"),
+    "api": ("scanner", ["--mode", "api"], "varredura interativa pelo JSON de detalhes (Chrome só se faltar telefone)"),
+    "batch": ("batchScan", [], "varredura em lote de uma lista de cidades, sem interação"),
+    "queue": ("queueWorker", [], "fila distribuída: enqueue, work e status"),
+    "export": ("columnarExport", [], "exporta todas as cidades para um arquivo Arrow"),
+    "normalize": ("phoneNormalize", [], "normaliza e valida (E.164) os telefones salvos"),
+    "dedupe": ("stationDedupe", [], "agrupa estações duplicadas (mesmo telefone ou nomes parecidos)"),
+    "geo": ("spatialIndex", [], "índice espacial: estações por raio, bbox ou vizinhos mais próximos"),
+    "index": ("stationIndex", [], "reconstrói o índice global de estações"),
+    "lookup": ("lookupService", [], "serviço HTTP local de consulta por telefone, id, cidade e nome"),
+    "replay": ("replayHarness", [], "serve as fixtures gravadas com --record"),
+    "bench": ("benchScan", [], "benchmark offline sobre as fixtures gravadas"),
+}
+
+
+def usage():
+    lines = ["uso: python -m capturephones <comando> [opções]", "", "comandos:"]
+    lines += [f"  {name:<10} {description}" for name, (_, _, description) in COMMANDS.items()]
+    lines += ["", "Use `python -m capturephones <comando> --help` para as opções de cada comando."]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS:
+        print(usage())
+        return 0 if argv and argv[0] in ("-h", "--help") else 2
+
+    command, rest = argv[0], argv[1:]
+    module_name, fixed_args, _ = COMMANDS[command]
+    # O argparse de cada módulo usa sys.argv[0] como nome do programa na ajuda
+    sys.argv[0] = f"capturephones {command}"
+    module = importlib.import_module(f".{module_name}", __package__)
+    return module.main(fixed_args + rest)
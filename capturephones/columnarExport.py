@@ -0,0 +1,127 @@
+import argparse
+import os
+from itertools import groupby
+from .cityStore import FOLDER_NAME, city_files, load_city
+from .phoneNormalize import mark_duplicates, normalize_numbers
+
+# Arquivo colunar com todas as cidades (Arrow IPC sem compressão, pode ser lido via mmap)
+EXPORT_PATH = os.path.join(FOLDER_NAME, "stations.arrow")
+
+COLUMNS = ("city", "station_id", "name", "phone", "phone_status", "phone_duplicate", "source", "fetched_at", "lat", "lng")
+
+
+def require_pyarrow():
+    """Importa o pyarrow só quando a exportação é usada (dependência opcional)."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise SystemExit("❌ A exportação colunar precisa do pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def iter_rows(folder=FOLDER_NAME):
+    """Percorre todas as cidades da pasta e gera uma linha (dict) por estação, com o telefone ainda bruto."""
+    for path in city_files(folder):
+        try:
+            city, stations = load_city(path)
+        except Exception as e:
+            print(f"⚠️ Ignorando {path}: {e}")
+            continue
+
+        for key, record in stations.items():
+            yield {
+                "city": city,
+                "station_id": None if key.startswith("row:") else key.split(":", 1)[1],
+                "name": record.get("name"),
+                "phone": record.get("phone"),
+                "source": record.get("source", "legacy"),
+                "fetched_at": record.get("ts"),
+                "lat": record.get("lat"),
+                "lng": record.get("lng"),
+            }
+
+
+def city_duplicates(cities, e164):
+    """
+    `phoneNormalize.mark_duplicates` aplicado a cada cidade: marca o número válido
+    que já apareceu antes na mesma cidade. As linhas de uma cidade vêm juntas (`iter_rows`).
+    """
+    duplicates = []
+    start = 0
+    for _, group in groupby(cities):
+        end = start + sum(1 for _ in group)
+        duplicates.extend(mark_duplicates(e164[start:end]))
+        start = end
+    return duplicates
+
+
+def build_table(rows):
+    """
+    Monta a tabela Arrow a partir das linhas de `iter_rows`, normalizando todos os
+    telefones em E.164 de uma vez. `phone_duplicate` marca as repetições dentro da
+    cidade; filtre por ela para ter cada número uma vez só.
+    """
+    pa = require_pyarrow()
+    columns = {name: [] for name in COLUMNS if name not in ("phone_status", "phone_duplicate")}
+    for row in rows:
+        for name in columns:
+            columns[name].append(row[name])
+    columns["phone"], columns["phone_status"] = normalize_numbers(columns["phone"])
+    columns["phone_duplicate"] = city_duplicates(columns["city"], columns["phone"])
+
+    schema = pa.schema([
+        ("city", pa.string()),
+        ("station_id", pa.string()),
+        ("name", pa.string()),
+        ("phone", pa.string()),
+        ("phone_status", pa.string()),
+        ("phone_duplicate", pa.bool_()),
+        ("source", pa.string()),
+        ("fetched_at", pa.timestamp("s", tz="UTC")),
+        ("lat", pa.float64()),
+        ("lng", pa.float64()),
+    ])
+    columns["fetched_at"] = [int(ts) if ts is not None else None for ts in columns["fetched_at"]]
+    return pa.table(columns, schema=schema)
+
+
+def export_cities(folder=FOLDER_NAME, path=EXPORT_PATH):
+    """Converte todos os `numPerCity/*.json` (e seus journals) em um único arquivo Arrow IPC."""
+    pa = require_pyarrow()
+    table = build_table(iter_rows(folder))
+
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return table.num_rows
+
+
+def load_stations(path=EXPORT_PATH, columns=None):
+    """
+    Abre o arquivo exportado via mmap e retorna uma `pyarrow.Table`.
+
+    Passe `columns` para ler só as colunas necessárias; os dados não são copiados
+    para a memória até serem usados.
+    """
+    pa = require_pyarrow()
+    source = pa.memory_map(path, "r")
+    table = pa.ipc.open_file(source).read_all()
+    return table.select(list(columns)) if columns else table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta os resultados de todas as cidades para um arquivo colunar (Arrow IPC).")
+    parser.add_argument("--folder", default=FOLDER_NAME, help="pasta com os arquivos <cidade>.json")
+    parser.add_argument("--output", default=None, help=f"arquivo de saída (padrão: <folder>/{os.path.basename(EXPORT_PATH)})")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(args.folder, os.path.basename(EXPORT_PATH))
+    count = export_cities(args.folder, output)
+    print(f"✅ {count} estações exportadas para `{output}`.")
+
+
+if __name__ == "__main__":
+    main()
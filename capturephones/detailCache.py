@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from .cityStore import FOLDER_NAME
+
+# Arquivo SQLite do cache de detalhes, guardado junto com os resultados das cidades
+CACHE_PATH = os.path.join(FOLDER_NAME, ".detail_cache.sqlite")
+
+DEFAULT_TTL = 7 * 24 * 3600          # 7 dias
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB de JSON de detalhes
+EVICT_EVERY = 200                    # roda a limpeza a cada N inserções
+
+
+class DetailCache:
+    """
+    Cache persistente dos detalhes de estabelecimentos, indexado pela `url` que vem
+    no payload de `locations/region`.
+
+    Cada entrada guarda o telefone extraído e o JSON bruto de detalhes, com validade
+    própria (TTL). Quando o cache passa de `max_entries` entradas ou `max_bytes`
+    bytes, as entradas acessadas há mais tempo são removidas (LRU).
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._puts = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS details ("
+            " url TEXT PRIMARY KEY, phone TEXT, details TEXT,"
+            " fetched_at REAL, expires_at REAL, last_access REAL, size INTEGER)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS details_last_access ON details(last_access)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, url):
+        """Retorna {"phone", "details", "fetched_at"} se houver entrada válida para a URL, senão None."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT phone, details, fetched_at, expires_at FROM details WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[3] < now:
+                self._db.execute("DELETE FROM details WHERE url = ?", (url,))
+                return None
+            self._db.execute("UPDATE details SET last_access = ? WHERE url = ?", (now, url))
+
+        return {
+            "phone": row[0],
+            "details": json.loads(row[1]) if row[1] else None,
+            "fetched_at": row[2],
+        }
+
+    def put(self, url, phone, details=None, ttl=None):
+        """Grava (ou substitui) a entrada de uma URL."""
+        now = time.time()
+        raw = json.dumps(details, ensure_ascii=False) if details is not None else None
+        size = len(raw) if raw else 0
+        expires_at = now + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO details (url, phone, details, fetched_at, expires_at, last_access, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, phone, raw, now, expires_at, now, size),
+            )
+            self._puts += 1
+            if self._puts % EVICT_EVERY == 0:
+                self._evict()
+
+    def _evict(self):
+        """Remove entradas vencidas e, se preciso, as menos usadas até respeitar os limites (com o lock já obtido)."""
+        self._db.execute("DELETE FROM details WHERE expires_at < ?", (time.time(),))
+
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM details").fetchone()
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM details WHERE url IN (SELECT url FROM details ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM details").fetchone()
+
+        if total > self.max_bytes:
+            excess = total - self.max_bytes
+            rows = self._db.execute("SELECT url, size FROM details ORDER BY last_access").fetchall()
+            victims = []
+            for url, size in rows:
+                if excess <= 0:
+                    break
+                victims.append((url,))
+                excess -= size
+            self._db.executemany("DELETE FROM details WHERE url = ?", victims)
+
+    def close(self):
+        with self._lock:
+            self._evict()
+            self._db.close()
@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from .runMetrics import metrics
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36"
+
+
+def get_cookies_from_browser(driver):
+    """Captura os cookies da sessão do navegador para serem usados nas requisições."""
+    cookies = driver.get_cookies()
+    return {cookie['name']: cookie['value'] for cookie in cookies}
+
+
+def create_session(cookies=None, pool_size=10):
+    """
+    Cria uma `requests.Session` com pool de conexões, User-Agent do navegador e
+    os cookies da sessão do PlugShare (evita o erro 401 nas requisições de detalhes).
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT, "Accept": "application/json"})
+    if cookies:
+        session.cookies.update(cookies)
+    return session
+
+
+def extract_phone(details):
+    """Extrai o telefone do JSON de detalhes do estabelecimento (ou None se não houver)."""
+    if not isinstance(details, dict):
+        return None
+    return details.get("e164_phone_number") or details.get("formatted_phone_number") or None
+
+
+def parse_retry_after(value):
+    """Converte o cabeçalho `Retry-After` (segundos ou data HTTP) em segundos de espera."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class RateLimiter:
+    """
+    Limita a taxa de início de requisições (no máximo `max_rate` por segundo) e
+    permite pausar todos os workers quando o servidor pede para esperar (429/503).
+    """
+
+    def __init__(self, max_rate=None):
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+
+    def wait(self):
+        """Bloqueia até o próximo horário livre para uma requisição."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until and now >= self._next_slot:
+                    self._next_slot = now + self.interval
+                    return
+                delay = max(self._paused_until, self._next_slot) - now
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        """Suspende novas requisições por `seconds` segundos."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class DetailFetcher:
+    """
+    Busca os JSONs de detalhes com até `workers` requisições simultâneas sobre um
+    único pool de conexões, respeitando `max_rate` requisições por segundo.
+
+    Respostas 429/503 pausam todos os workers pelo tempo de `Retry-After` (ou por um
+    backoff exponencial, se o cabeçalho não vier) antes de tentar de novo.
+
+    Com um `cache` (DetailCache), URLs já conhecidas não vão para a rede e cada JSON
+    baixado é gravado no cache; `refresh=True` ignora as entradas existentes.
+
+    `name` prefixa as métricas (`<name>_fetch`, `<name>_retries`, `<name>_errors`):
+    o mesmo mecanismo busca as respostas `locations/region` dos tiles com "region".
+    """
+
+    RETRY_STATUS = (429, 503)
+
+    def __init__(self, session, workers=4, max_rate=2.0, max_retries=3, backoff=2.0, timeout=15,
+                 cache=None, refresh=False, name="detail"):
+        self.session = session
+        self.name = name
+        self.cache = cache
+        self.refresh = refresh
+        self.workers = workers
+        self.limiter = RateLimiter(max_rate)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    def fetch(self, detail_url):
+        """Busca os detalhes de um estabelecimento (no cache ou na rede); retorna o JSON ou None."""
+        if self.cache is not None and not self.refresh:
+            entry = self.cache.get(detail_url)
+            if entry is not None and entry["details"] is not None:
+                metrics.count("cache_hits")
+                return entry["details"]
+
+        details = self._fetch_remote(detail_url)
+        if details is not None and self.cache is not None:
+            self.cache.put(detail_url, extract_phone(details), details)
+        return details
+
+    def _fetch_remote(self, detail_url):
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait()
+            try:
+                with metrics.stage(f"{self.name}_fetch"):
+                    response = self.session.get(detail_url, timeout=self.timeout)
+            except Exception as e:
+                print(f"⚠️ Erro na requisição para {detail_url}: {e}")
+                self.limiter.pause(self.backoff * 2 ** attempt)
+                metrics.count(f"{self.name}_retries")
+                continue
+
+            if response.status_code in self.RETRY_STATUS:
+                delay = parse_retry_after(response.headers.get("Retry-After"))
+                if delay is None:
+                    delay = self.backoff * 2 ** attempt
+                print(f"⏳ HTTP {response.status_code} em {detail_url}, aguardando {delay:.1f}s...")
+                self.limiter.pause(delay)
+                metrics.count(f"{self.name}_retries")
+                metrics.count(f"http_{response.status_code}")
+                continue
+
+            if response.status_code != 200:
+                print(f"⚠️ Erro ao acessar {detail_url}: HTTP {response.status_code}")
+                metrics.count(f"{self.name}_errors")
+                return None
+            try:
+                return response.json()
+            except ValueError:
+                print(f"⚠️ A resposta de {detail_url} não é JSON.")
+                return None
+
+        print(f"❌ Desistindo de {detail_url} após {self.max_retries} novas tentativas.")
+        metrics.count(f"{self.name}_errors")
+        return None
+
+    def pipeline(self, items, url_of, window=None):
+        """
+        Busca os detalhes de `items` em paralelo e devolve pares (item, detalhes) na
+        ordem de entrada.
+
+        `items` pode ser um gerador: no máximo `window` buscas ficam adiantadas, então
+        o primeiro resultado sai antes de a entrada terminar. Itens em que `url_of`
+        devolve None passam direto, com detalhes None.
+        """
+        window = window or self.workers * 4
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for item in items:
+                detail_url = url_of(item)
+                pending.append((item, pool.submit(self.fetch, detail_url) if detail_url else None))
+                if len(pending) >= window:
+                    item, future = pending.popleft()
+                    yield item, future.result() if future else None
+            while pending:
+                item, future = pending.popleft()
+                yield item, future.result() if future else None
+
+    def map(self, detail_urls):
+        """Busca todas as URLs em paralelo e devolve os resultados na ordem de entrada."""
+        for _, details in self.pipeline(detail_urls, lambda detail_url: detail_url):
+            yield details
@@ -0,0 +1,219 @@
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+
+# Onde guardamos o caminho do chromedriver já resolvido (evita a consulta de versão a cada execução)
+DRIVER_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "capturephones", "chromedriver.json")
+
+# No meio de uma tarefa, a memória do navegador é medida no máximo a cada tantas páginas (varre o /proc)
+MEMORY_CHECK_PAGES = 25
+
+
+def resolve_chromedriver(cache_path=DRIVER_CACHE_PATH, refresh=False):
+    """
+    Retorna o caminho do chromedriver, resolvendo com o ChromeDriverManager só na
+    primeira vez. As execuções seguintes usam o caminho salvo, sem acessar a rede.
+
+    Se o ChromeDriverManager falhar (ex.: sem internet), usa o `chromedriver` do PATH
+    ou, em último caso, devolve None para o Selenium Manager resolver sozinho.
+    """
+    if not refresh and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                path = json.load(f).get("path")
+            if path and os.path.exists(path):
+                return path
+        except Exception:
+            pass
+
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+    except Exception as e:
+        print(f"⚠️ Não foi possível resolver o chromedriver pelo ChromeDriverManager: {e}")
+        return shutil.which("chromedriver")
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"path": path}, f)
+    return path
+
+
+def browser_memory_mb(driver):
+    """Soma a memória residente (RSS) do chromedriver e de todos os processos Chrome filhos, em MB."""
+    try:
+        root_pid = driver.service.process.pid
+    except Exception:
+        return None
+    if not os.path.isdir("/proc"):
+        return None
+
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # O nome do processo vem entre parênteses e pode conter espaços
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except Exception:
+            continue
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f"/proc/{pid}/statm", "r") as f:
+                total += int(f.read().split()[1]) * page_size
+        except Exception:
+            pass
+        stack.extend(children.get(pid, []))
+    return total / (1024 * 1024)
+
+
+def available_memory_mb():
+    """Memória disponível na máquina, em MB (MemAvailable do /proc/meminfo), ou None se não der para saber."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except Exception:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class DriverPool:
+    """
+    Mantém navegadores "quentes" (com seus cookies) para reaproveitar entre tarefas.
+
+    `factory` cria um WebDriver novo (ex.: `setup_driver`). Cada navegador é reciclado
+    depois de `max_pages` navegações ou quando a memória passa de `max_memory_mb`:
+    ao ser devolvido ou, no meio de uma tarefa longa (uma cidade grande), por
+    `recycle_if_needed`, que troca o navegador emprestado por um novo. Cada navegador
+    criado pelo pool aponta para ele em `driver.pool`.
+    `created` conta os navegadores já criados (muda quando um é reciclado).
+    """
+
+    def __init__(self, factory, max_pages=300, max_memory_mb=1500):
+        self.factory = factory
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self._idle = []
+        self._all = set()
+        self._pages = {}
+        self._memory_checked = {}  # id do navegador -> páginas na última medição de memória
+        self._replaced = {}        # id do navegador reciclado no meio do empréstimo -> substituto
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def _create(self):
+        driver = self.factory()
+        self.created += 1
+        self._pages[id(driver)] = 0
+        original_get = driver.get
+
+        def count_page():
+            self._pages[id(driver)] += 1
+
+        def counting_get(url):
+            count_page()
+            return original_get(url)
+
+        # Conta as navegações para saber quando reciclar o navegador; quem navega sem
+        # `driver.get` (ex.: `location.assign` nas abas do TabPipeline) chama `driver.count_page()`
+        driver.get = counting_get
+        driver.count_page = count_page
+        driver.pool = self
+        with self._lock:
+            self._all.add(driver)
+        return driver
+
+    def acquire(self):
+        """Entrega um navegador livre do pool (ou cria um novo)."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._create()
+
+    def _over_limits(self, pages, memory):
+        return pages >= self.max_pages or (memory is not None and memory >= self.max_memory_mb)
+
+    def release(self, driver):
+        """Devolve o navegador ao pool, reciclando-o se passou dos limites."""
+        pages = self._pages.get(id(driver), 0)
+        memory = browser_memory_mb(driver) if self.max_memory_mb else None
+
+        if self._over_limits(pages, memory):
+            print(f"♻️ Reciclando navegador ({pages} páginas, {memory or 0:.0f} MB).")
+            self._discard(driver)
+            return
+
+        with self._lock:
+            self._idle.append(driver)
+
+    def should_recycle(self, driver):
+        """Se o navegador emprestado já passou dos limites (a memória é medida a cada `MEMORY_CHECK_PAGES` páginas)."""
+        pages = self._pages.get(id(driver), 0)
+        memory = None
+        if self.max_memory_mb and pages - self._memory_checked.get(id(driver), 0) >= MEMORY_CHECK_PAGES:
+            self._memory_checked[id(driver)] = pages
+            memory = browser_memory_mb(driver)
+        return self._over_limits(pages, memory)
+
+    def renew(self, driver):
+        """Troca o navegador emprestado por um novo; o `lease` em andamento passa a devolver o substituto."""
+        print(f"♻️ Reciclando navegador no meio da tarefa ({self._pages.get(id(driver), 0)} páginas).")
+        self._discard(driver)
+        replacement = self._create()
+        with self._lock:
+            self._replaced[id(driver)] = replacement
+        return replacement
+
+    def recycle_if_needed(self, driver):
+        """Devolve o mesmo navegador, ou um novo se ele passou dos limites no meio da tarefa."""
+        return self.renew(driver) if self.should_recycle(driver) else driver
+
+    def _current(self, driver):
+        """O navegador que substituiu `driver` durante o empréstimo (ou ele mesmo)."""
+        with self._lock:
+            while id(driver) in self._replaced:
+                driver = self._replaced.pop(id(driver))
+        return driver
+
+    @contextmanager
+    def lease(self):
+        """Context manager que empresta um navegador e o devolve ao final (ou descarta, se deu erro)."""
+        driver = self.acquire()
+        try:
+            yield driver
+        except Exception:
+            self._discard(self._current(driver))
+            raise
+        else:
+            self.release(self._current(driver))
+
+    def _discard(self, driver):
+        with self._lock:
+            self._all.discard(driver)
+            self._pages.pop(id(driver), None)
+            self._memory_checked.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Encerra todos os navegadores do pool."""
+        with self._lock:
+            drivers = list(self._all)
+            self._idle.clear()
+        for driver in drivers:
+            self._discard(driver)
@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl, unquote
+from .cityStore import FOLDER_NAME, city_files, load_city
+from .phoneNormalize import normalize_numbers
+
+DEFAULT_LIMIT = 50
+RELOAD_INTERVAL = 2.0  # segundos entre verificações de arquivos alterados
+
+FIELDS = ("city", "id", "url", "name", "phone", "phone_e164", "stale", "lat", "lng")
+
+
+def fold_name(text):
+    """Nome em minúsculas e sem acentos, para a busca por prefixo."""
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(char for char in text if not unicodedata.combining(char)).casefold().strip()
+
+
+class Snapshot:
+    """
+    Índices imutáveis sobre todas as estações salvas, montados de uma vez.
+
+    As estações ficam em colunas (listas paralelas) e os índices guardam só
+    posições: telefone E.164, chave da estação (`id:`/`url:`), cidade e os nomes
+    normalizados em ordem (busca por prefixo com bisect, por nome inteiro ou por
+    qualquer palavra do nome).
+    """
+
+    def __init__(self, cities):
+        self.columns = {field: [] for field in FIELDS}
+        self.by_key = {}
+        self.by_phone = {}
+        self.by_city = {}
+
+        for city, stations in cities:
+            for key, record in stations.items():
+                row = len(self.columns["name"])
+                for field in ("id", "url", "name", "phone", "stale", "lat", "lng"):
+                    self.columns[field].append(record.get(field))
+                self.columns["city"].append(city)
+                self.by_key[key] = row
+                self.by_city.setdefault(fold_name(city), []).append(row)
+
+        e164, _ = normalize_numbers(self.columns["phone"])
+        self.columns["phone_e164"] = e164
+        for row, number in enumerate(e164):
+            if number is not None:
+                self.by_phone.setdefault(number, []).append(row)
+
+        names = []
+        for row, name in enumerate(self.columns["name"]):
+            folded = fold_name(name)
+            names.append((folded, row))
+            names.extend((word, row) for word in folded.split()[1:])
+        names.sort()
+        self.name_keys = [name for name, _ in names]
+        self.name_rows = [row for _, row in names]
+        self.size = len(self.columns["name"])
+        self.loaded_at = time.time()
+
+    def row(self, row):
+        return {field: self.columns[field][row] for field in FIELDS}
+
+    def phone(self, number):
+        """Estações com o telefone (em qualquer formato; é normalizado antes)."""
+        rows = self.by_phone.get(number)
+        if rows is None:
+            number = normalize_numbers([number])[0][0]
+            rows = self.by_phone.get(number, ()) if number else ()
+        return [self.row(row) for row in rows]
+
+    def station(self, key):
+        """Estação pela chave `id:<id>` / `url:<url>`, ou só pelo id."""
+        row = self.by_key.get(key if ":" in key else f"id:{key}")
+        return None if row is None else self.row(row)
+
+    def city(self, name, limit=DEFAULT_LIMIT):
+        return [self.row(row) for row in self.by_city.get(fold_name(name), ())[:limit]]
+
+    def prefix(self, text, limit=DEFAULT_LIMIT):
+        """Estações cujo nome (ou uma palavra do nome) começa com `text`."""
+        text = fold_name(text)
+        if not text:
+            return []
+        found, seen = [], set()
+        index = bisect_left(self.name_keys, text)
+        while index < len(self.name_keys) and self.name_keys[index].startswith(text) and len(found) < limit:
+            row = self.name_rows[index]
+            if row not in seen:
+                seen.add(row)
+                found.append(self.row(row))
+            index += 1
+        return found
+
+
+class StationLookup:
+    """
+    Consulta somente leitura sobre os resultados em `numPerCity/`.
+
+    Carrega todas as cidades na inicialização e, a cada `reload()`, relê só as
+    cidades cujo `.json`/`.jsonl` mudou e troca o `Snapshot` inteiro de uma vez;
+    consultas em andamento continuam usando o snapshot anterior, sem travas.
+    Com `watch()`, uma thread de fundo faz isso a cada `interval` segundos.
+    """
+
+    def __init__(self, folder=FOLDER_NAME):
+        self.folder = folder
+        self._cities = {}  # caminho -> (assinatura dos arquivos, cidade, estações)
+        self._stop = threading.Event()
+        self.snapshot = None
+        self.reload()
+
+    def _signature(self, json_path):
+        journal_path = os.path.splitext(json_path)[0] + ".jsonl"
+        signature = []
+        for path in (json_path, journal_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def reload(self):
+        """Relê as cidades alteradas; retorna True se o snapshot foi trocado."""
+        cities = {}
+        changed = self.snapshot is None
+        for path in city_files(self.folder):
+            signature = self._signature(path)
+            cached = self._cities.get(path)
+            if cached is not None and cached[0] == signature:
+                cities[path] = cached
+                continue
+            try:
+                city, stations = load_city(path)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Não foi possível ler `{path}`: {e}")
+                if cached is not None:
+                    cities[path] = cached
+                continue
+            cities[path] = (signature, city, stations)
+            changed = True
+
+        if not changed and cities.keys() == self._cities.keys():
+            return False
+        self._cities = cities
+        self.snapshot = Snapshot((city, stations) for _, city, stations in cities.values())
+        print(f"🔄 {self.snapshot.size} estações carregadas de {len(cities)} cidades.")
+        return True
+
+    def watch(self, interval=RELOAD_INTERVAL):
+        """Inicia a recarga automática em segundo plano."""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"⚠️ Falha ao recarregar as cidades: {e}")
+
+        threading.Thread(target=run, daemon=True).start()
+        return self
+
+    def close(self):
+        self._stop.set()
+
+
+def make_handler(lookup):
+    """Rotas: /phone/<número>, /station/<id ou chave>, /city/<nome>, /search?prefix=..., /stats."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            params = dict(parse_qsl(parts.query))
+            route, _, arg = parts.path.strip("/").partition("/")
+            arg = unquote(arg)
+            snapshot = lookup.snapshot
+            try:
+                limit = int(params.get("limit", DEFAULT_LIMIT))
+            except ValueError:
+                limit = DEFAULT_LIMIT
+
+            if route == "phone" and arg:
+                self.send_json(200, snapshot.phone(arg))
+            elif route == "station" and arg:
+                station = snapshot.station(arg)
+                self.send_json(200 if station else 404, station)
+            elif route == "city" and arg:
+                self.send_json(200, snapshot.city(arg, limit))
+            elif route == "search":
+                self.send_json(200, snapshot.prefix(params.get("prefix", ""), limit))
+            elif route == "stats":
+                self.send_json(200, {"stations": snapshot.size, "phones": len(snapshot.by_phone),
+                                     "cities": len(snapshot.by_city), "loaded_at": snapshot.loaded_at})
+            else:
+                self.send_json(404, {"error": "rota desconhecida"})
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço local de consulta (somente leitura) das estações salvas.")
+    parser.add_argument("--folder", default=FOLDER_NAME, help="pasta com os arquivos <cidade>.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--interval", type=float, default=RELOAD_INTERVAL,
+                        help="segundos entre verificações de cidades alteradas (0 = sem recarga)")
+    args = parser.parse_args(argv)
+
+    lookup = StationLookup(args.folder)
+    if args.interval:
+        lookup.watch(args.interval)
+
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(lookup))
+    httpd.daemon_threads = True
+    print(f"🔎 Consultas em http://{args.host}:{httpd.server_port} (/phone, /station, /city, /search, /stats)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        lookup.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import re
+from .cityStore import FOLDER_NAME, city_files, load_city
+
+# Código do país usado para números nacionais (sem +55)
+DEFAULT_COUNTRY_CODE = "55"
+
+VALID = "valid"
+INVALID = "invalid"
+MISSING = "missing"
+
+# Mantém só dígitos, "+" e as quebras de linha que separam os números no bloco
+STRIP_RE = re.compile(r"[^\d+\n]+")
+# "+" fora do início da linha é lixo de formatação
+INNER_PLUS_RE = re.compile(r"(?m)(?<!^)\+")
+
+
+def build_rules(country_code=DEFAULT_COUNTRY_CODE):
+    """
+    Tabela de regras aplicadas, em ordem, sobre o bloco inteiro de números (uma
+    linha por número). Cada regra é (padrão compilado, substituição).
+    """
+    return [
+        # Prefixo internacional 00 -> +
+        (re.compile(r"(?m)^00(?=\d{8,15}$)"), "+"),
+        # Código do país sem "+" (ex.: 5555996636076)
+        (re.compile(rf"(?m)^(?={country_code}\d{{10,11}}$)"), "+"),
+        # Número nacional com DDD, com ou sem o 0 de tronco (ex.: 055996636076, 5532231210)
+        (re.compile(r"(?m)^0?(?=\d{10,11}$)"), f"+{country_code}"),
+    ]
+
+
+def build_valid_re(country_code=DEFAULT_COUNTRY_CODE):
+    """Padrão E.164 válido: celular/fixo brasileiro completo ou número internacional de 8 a 15 dígitos."""
+    if country_code == "55":
+        national = r"\+55[1-9][1-9](?:9\d{8}|[2-8]\d{7})"
+    else:
+        national = rf"\+{country_code}\d{{6,13}}"
+    return re.compile(rf"{national}|\+(?!{country_code})[1-9]\d{{7,14}}")
+
+
+RULES = build_rules()
+VALID_RE = build_valid_re()
+
+
+def normalize_numbers(numbers, rules=RULES, valid_re=VALID_RE):
+    """
+    Normaliza uma lista inteira de telefones de uma vez.
+
+    Os números são unidos em um único bloco de texto e cada regra da tabela roda
+    uma vez sobre o bloco todo, sem laço Python por registro. Retorna duas listas
+    alinhadas com a entrada: o número em E.164 (ou None) e a classificação
+    ("valid", "invalid" ou "missing"). Textos sem dígitos, como
+    "Telefone não encontrado", contam como ausentes.
+    """
+    block = "\n".join((number or "").replace("\n", " ") for number in numbers)
+    block = STRIP_RE.sub("", block)
+    block = INNER_PLUS_RE.sub("", block)
+    for pattern, replacement in rules:
+        block = pattern.sub(replacement, block)
+
+    lines = block.split("\n") if numbers else []
+    fullmatch = valid_re.fullmatch
+    statuses = [VALID if fullmatch(line) else (INVALID if line.strip("+") else MISSING) for line in lines]
+    e164 = [line if status == VALID else None for line, status in zip(lines, statuses)]
+    return e164, statuses
+
+
+def mark_duplicates(e164):
+    """Indica, para cada posição, se o mesmo número válido já apareceu antes na lista."""
+    seen = set()
+    duplicates = []
+    for number in e164:
+        duplicates.append(number is not None and number in seen)
+        if number is not None:
+            seen.add(number)
+    return duplicates
+
+
+def unique_numbers(e164):
+    """Lista de números válidos sem repetição, na ordem em que aparecem."""
+    return [number for number in dict.fromkeys(e164) if number is not None]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Normaliza e valida (E.164) os telefones de todas as cidades salvas.")
+    parser.add_argument("--folder", default=FOLDER_NAME, help="pasta com os arquivos <cidade>.json")
+    args = parser.parse_args(argv)
+
+    for path in city_files(args.folder):
+        city, stations = load_city(path)
+        e164, statuses = normalize_numbers([record.get("phone") for record in stations.values()])
+        unique = unique_numbers(e164)
+        print(
+            f"📞 {city}: {statuses.count(VALID)} válidos ({len(unique)} únicos), "
+            f"{statuses.count(INVALID)} inválidos, {statuses.count(MISSING)} ausentes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import argparse
+import os
+import socket
+import time
+import uuid
+from .cityList import read_city_list
+from .cityStore import FOLDER_NAME, CityStore, StationDiff, station_key
+from .regionStream import as_establishments, coordinates
+from .detailCache import DetailCache
+from .driverPool import DriverPool
+from .resourcePolicy import policy_from_args
+from .runMetrics import metrics
+from .scanOptions import add_detail_arguments, write_run_reports
+from .stationIndex import StationIndex
+from .workQueue import DEFAULT_LEASE, DEFAULT_MAX_ATTEMPTS, Heartbeat, open_queue
+
+# Fila padrão: um SQLite junto dos resultados (use redis://... para várias máquinas)
+QUEUE_PATH = os.path.join(FOLDER_NAME, ".work_queue.sqlite")
+
+CITY_QUEUE = "cities"
+DETAIL_QUEUE = "details"
+
+
+def worker_name():
+    """Identificador único do worker: máquina, processo e um sufixo aleatório."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def enqueue_cities(queue, city_list):
+    """Enfileira uma rodada das cidades da lista. Cada rodada tem ids próprios, então pode ser repetida."""
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    jobs = [
+        (f"city:{stamp}:{city_name}", {"city": city_name, "bbox": bbox})
+        for city_name, bbox in read_city_list(city_list)
+    ]
+    added = queue.enqueue_many(CITY_QUEUE, jobs)
+    print(f"📥 {added} cidades enfileiradas (rodada {stamp}).")
+    return added
+
+
+class Worker:
+    """
+    Worker da fila distribuída. Processa dois tipos de job:
+
+      - cidade: captura o payload `locations/region`, marca as estações que sumiram
+        e enfileira um job de detalhes por estação nova ou alterada;
+      - detalhes: resolve o telefone de uma estação (índice global, cache, API ou
+        página no Chrome) e grava no journal compartilhado da cidade.
+
+    O último job de detalhes de uma cidade compacta `numPerCity/<cidade>.json`.
+    O navegador só é aberto quando um job precisa dele; os módulos de varredura
+    (Selenium, requests) só são importados pelo worker, não por `enqueue`/`status`.
+    """
+
+    def __init__(self, queue, args):
+        from .detailFetch import DetailFetcher, create_session
+        from .scanner import setup_driver
+
+        self.queue = queue
+        self.args = args
+        self.name = worker_name()
+        self.template = args.region_template
+        self.pool = DriverPool(lambda: setup_driver(headless=not args.show),
+                               max_pages=args.max_pages, max_memory_mb=args.max_memory_mb)
+        self.cache = DetailCache(ttl=args.cache_ttl * 3600)
+        self.index = StationIndex()
+        self.fetcher = DetailFetcher(create_session(pool_size=1), workers=1, max_rate=args.max_rate,
+                                     cache=self.cache, refresh=args.refresh)
+        self.policy = policy_from_args(args)
+        self.stores = {}
+        self._cookies_from = 0  # `pool.created` quando a sessão recebeu os cookies (0 = nunca)
+
+    def store(self, city_name):
+        if city_name not in self.stores:
+            self.stores[city_name] = CityStore(city_name, shared=True)
+        return self.stores[city_name]
+
+    def handle_city(self, job):
+        from .batchScan import capture_city
+
+        city_name = job["payload"]["city"]
+        bbox = job["payload"]["bbox"]
+        print(f"🏙️ Cidade: {city_name}")
+
+        with self.pool.lease() as driver:
+            establishments, self.template = capture_city(driver, city_name, bbox and tuple(bbox), self.template, self.args)
+        if not establishments:
+            print(f"❌ Nenhum estabelecimento encontrado para {city_name}.")
+            metrics.count("cities_empty")
+            return
+
+        establishments = as_establishments(establishments)
+        store = self.store(city_name)
+        changed = set()
+        if not self.args.full:
+            diff = StationDiff(store.stations())
+            establishments = list(diff.filter(establishments))
+            changed = diff.changed
+            removed = diff.removed()
+            store.mark_stale(removed)
+            store.mark_stale(diff.revived, stale=False)
+            print(f"🆕 {len(establishments)} novos ou alterados, {len(removed)} removidos desde a última varredura.")
+
+        jobs = [
+            (f"{job['id']}/{station_key(est)}",
+             {"city": city_name, "id": est.get("id"), "name": est.get("name", "Nome não encontrado"), "url": est["url"],
+              "changed": station_key(est) in changed, **coordinates(est)})
+            for est in establishments if est.get("url")
+        ]
+        added = self.queue.enqueue_many(DETAIL_QUEUE, jobs, group=job["id"])
+        print(f"📤 {added} estações enfileiradas para {city_name}.")
+        metrics.count("cities_done")
+        if not jobs:
+            print(f"💾 Arquivo compactado: {store.compact()}")
+
+    def refresh_cookies(self):
+        """
+        Copia os cookies do PlugShare de um navegador do pool para a sessão da API
+        (sem eles, os detalhes respondem 401). Repete sempre que o pool criar um
+        navegador novo, já que o anterior pode ter sido reciclado.
+        """
+        if self._cookies_from and self._cookies_from == self.pool.created:
+            return
+        from .scanner import plugshare_cookies
+
+        with self.pool.lease() as driver:
+            self.fetcher.session.cookies.update(plugshare_cookies(driver))
+        self._cookies_from = self.pool.created
+
+    def handle_detail(self, job):
+        from .detailFetch import extract_phone
+        from .scanner import PHONE_NOT_FOUND, EXTRACTORS, fetch_phone
+
+        station = job["payload"]
+        city_name, name, detail_url = station["city"], station["name"], station["url"]
+
+        # Mesma ordem do scanner (iter_targets): índice global, cache de detalhes e só então a rede;
+        # uma estação que mudou de nome ou posição vai direto para a rede
+        indexed = entry = None
+        if not self.args.refresh and not station.get("changed"):
+            indexed = self.index.get(station, self.args.cache_ttl * 3600)
+            if indexed is None:
+                entry = self.cache.get(detail_url)
+        if indexed is not None:
+            phone, source = indexed["phone"] or PHONE_NOT_FOUND, "index"
+        elif entry and entry["phone"]:
+            phone, source = entry["phone"], "cache"
+            self.index.put(city_name, name, phone, id=station["id"], url=detail_url, source=source)
+        else:
+            details = None
+            if self.args.mode == "api":
+                self.refresh_cookies()
+                details = self.fetcher.fetch(detail_url)
+            phone = extract_phone(details)
+            source = "api"
+            if not phone:
+                with self.pool.lease() as driver:
+                    phone, source = fetch_phone(driver, detail_url, details, EXTRACTORS[self.args.extract], self.policy)
+                if phone != PHONE_NOT_FOUND:
+                    self.cache.put(detail_url, phone, details)
+            self.index.put(city_name, name, phone, id=station["id"], url=detail_url, source=source)
+
+        self.store(city_name).append(name, phone, id=station["id"], url=detail_url, source=source,
+                                     **coordinates(station))
+        metrics.count(f"source_{source}")
+        metrics.count("phones_missing" if phone == PHONE_NOT_FOUND else "phones_found")
+        print(f"✅ {city_name}: {name} - {phone}")
+
+    def finish_group(self, job):
+        """Compacta a cidade quando o último job de detalhes dela termina (concluído, com falha ou vencido)."""
+        if job["queue"] == DETAIL_QUEUE and self.queue.pending(job["group"]) == 0:
+            store = self.store(job["payload"]["city"])
+            store.sync()
+            print(f"💾 Arquivo compactado: {store.compact()}")
+
+    def run_one(self, queue_name, handler):
+        """Reserva e processa um job da fila; retorna False se ela estava vazia."""
+        # Um job que vence a reserva de vez vai para "dead" aqui mesmo: pode ter sido o último da cidade
+        job = self.queue.lease(queue_name, self.name, self.args.lease, on_dead=self.finish_group)
+        if job is None:
+            return False
+
+        try:
+            with metrics.stage(queue_name), Heartbeat(self.queue, job, self.args.lease) as heartbeat:
+                handler(job)
+        except Exception as e:
+            metrics.count(f"{queue_name}_failed")
+            print(f"❌ Falha no job {job['id']} (tentativa {job['attempts']}): {e}")
+            self.queue.fail(job, e)
+            self.finish_group(job)
+            return True
+
+        if heartbeat.lost or not self.queue.complete(job):
+            # Outro worker recebeu o job; o resultado gravado aqui é só uma duplicata
+            metrics.count(f"{queue_name}_lease_lost")
+            print(f"⚠️ A reserva do job {job['id']} venceu antes do fim.")
+            return True
+        self.finish_group(job)
+        return True
+
+    def run(self):
+        """Processa jobs até a fila esvaziar (com --exit-when-empty) ou para sempre."""
+        print(f"👷 Worker {self.name} iniciado.")
+        handlers = []
+        if "city" in self.args.roles:
+            handlers.append((CITY_QUEUE, self.handle_city))
+        if "detail" in self.args.roles:
+            handlers.append((DETAIL_QUEUE, self.handle_detail))
+
+        while True:
+            # Detalhes primeiro: terminam as cidades já iniciadas antes de abrir novas
+            if any(self.run_one(queue_name, handler) for queue_name, handler in reversed(handlers)):
+                continue
+            if self.args.exit_when_empty:
+                break
+            time.sleep(self.args.poll)
+
+    def close(self):
+        for store in self.stores.values():
+            store.close()
+        self.cache.close()
+        self.index.close()
+        self.pool.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fila distribuída de varreduras: enfileira cidades e roda workers.")
+    parser.add_argument("--queue", default=QUEUE_PATH,
+                        help="arquivo SQLite da fila ou URL redis://host:porta/db para várias máquinas")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="entregas de um job antes de desistir dele")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="enfileira as cidades de um arquivo (cidade ou cidade; bbox por linha)")
+    enqueue.add_argument("city_list")
+
+    commands.add_parser("status", help="mostra quantos jobs há em cada fila e status")
+
+    work = commands.add_parser("work", help="roda um worker")
+    work.add_argument("--roles", default="city,detail",
+                      help="tipos de job que este worker aceita, separados por vírgula (city, detail)")
+    work.add_argument("--lease", type=float, default=DEFAULT_LEASE,
+                      help="segundos de reserva de um job; o heartbeat renova a cada 1/3 disso")
+    work.add_argument("--poll", type=float, default=5.0, help="espera entre consultas com a fila vazia, em segundos")
+    work.add_argument("--exit-when-empty", action="store_true", help="encerra quando não houver mais jobs")
+    work.add_argument("--show", action="store_true", help="mostra o navegador em vez de rodar em modo headless")
+    work.add_argument("--region-template",
+                      help="URL `locations/region` usada como modelo para as linhas com bbox")
+    work.add_argument("--max-pages", type=int, default=300,
+                      help="recicla o navegador depois deste número de páginas")
+    work.add_argument("--max-memory-mb", type=float, default=1500,
+                      help="recicla o navegador quando ele passar deste uso de memória (0 = não verifica)")
+    add_detail_arguments(work)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    queue = open_queue(args.queue, args.max_attempts)
+
+    try:
+        if args.command == "enqueue":
+            enqueue_cities(queue, args.city_list)
+        elif args.command == "status":
+            for queue_name, counts in sorted(queue.stats().items()):
+                print(f"📊 {queue_name}: " + ", ".join(f"{status}={count}" for status, count in sorted(counts.items())))
+        else:
+            worker = Worker(queue, args)
+            try:
+                worker.run()
+            finally:
+                worker.close()
+                write_run_reports(args)
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
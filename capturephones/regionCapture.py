@@ -0,0 +1,103 @@
+import json
+import re
+import time
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Trecho da URL da API do PlugShare que devolve os estabelecimentos da região visível
+REGION_URL_FRAGMENT = "locations/region"
+
+# Extrai o requestId de um evento sem precisar decodificar o JSON inteiro
+REQUEST_ID_RE = re.compile(r'"requestId"\s*:\s*"([^"]+)"')
+
+
+class RegionCapture:
+    """
+    Acompanha os eventos de rede do Chrome (`Network.responseReceived` e
+    `Network.loadingFinished`) e captura o corpo da última resposta `locations/region`
+    assim que o carregamento dela termina.
+
+    Os eventos chegam pelo log de performance do ChromeDriver. Entradas que não
+    interessam são descartadas por comparação de texto, sem `json.loads`. Com um
+    `recorder` (replayHarness.Recorder), o corpo capturado também é gravado como fixture.
+    """
+
+    def __init__(self, driver, url_fragment=REGION_URL_FRAGMENT, recorder=None):
+        self.driver = driver
+        self.url_fragment = url_fragment
+        self.recorder = recorder
+        self.pending = {}     # requestId -> url das respostas ainda carregando
+        self.finished = {}    # requestId -> url das respostas completas
+        self.latest_id = None
+        self.latest_url = None
+        self.latest_at = 0.0  # time.monotonic() da última resposta `locations/region` vista
+
+    def reset(self):
+        """Descarta os eventos acumulados até agora."""
+        self.driver.get_log("performance")
+        self.pending.clear()
+        self.finished.clear()
+        self.latest_id = None
+        self.latest_url = None
+        self.latest_at = 0.0
+
+    def poll(self):
+        """Processa os eventos novos do log e indica se a última resposta já terminou de carregar."""
+        for entry in self.driver.get_log("performance"):
+            raw = entry["message"]
+
+            if "Network.responseReceived" in raw:
+                if self.url_fragment not in raw:
+                    continue
+                message = json.loads(raw)["message"]
+                if message.get("method") != "Network.responseReceived":
+                    continue
+                url = message["params"]["response"]["url"]
+                if self.url_fragment in url:
+                    request_id = message["params"]["requestId"]
+                    self.pending[request_id] = url
+                    self.latest_id, self.latest_url = request_id, url
+                    self.latest_at = time.monotonic()
+
+            elif self.pending and ("Network.loadingFinished" in raw or "Network.loadingFailed" in raw):
+                match = REQUEST_ID_RE.search(raw)
+                if not match or match.group(1) not in self.pending:
+                    continue
+                url = self.pending.pop(match.group(1))
+                if "Network.loadingFinished" in raw:
+                    self.finished[match.group(1)] = url
+
+        return self.latest_id is not None and self.latest_id in self.finished
+
+    def settled(self, quiet, since=0.0):
+        """
+        A última resposta terminou, nenhuma outra está carregando e nenhuma nova
+        chegou nos últimos `quiet` segundos (contados a partir de `since`, no mínimo).
+        """
+        return self.poll() and not self.pending and time.monotonic() - max(self.latest_at, since) >= quiet
+
+    def wait_for_latest_body(self, timeout=20, poll_frequency=0.2, quiet=0):
+        """
+        Aguarda a última resposta `locations/region` terminar e devolve o corpo bruto (ou None).
+
+        Com `quiet`, espera também o tráfego da região parar por esse tempo desde a
+        chamada: o mapa pode pedir a região padrão ou posições intermediárias antes da final.
+        """
+        since = time.monotonic()
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=poll_frequency).until(
+                lambda d: self.settled(quiet, since)
+            )
+        except TimeoutException:
+            return None
+
+        print(f"✅ Última requisição capturada: {self.latest_url}")
+        try:
+            response = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": self.latest_id})
+        except Exception as e:
+            print(f"⚠️ Erro ao capturar resposta de `{self.latest_url}`: {e}")
+            return None
+
+        if self.recorder is not None:
+            self.recorder.record(self.latest_url, response["body"], "application/json", "region")
+        return response["body"]
@@ -0,0 +1,64 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Parâmetros de viewport da API `locations/region` do PlugShare: centro do mapa
+# (latitude/longitude) e a extensão visível em graus (spanLat/spanLng).
+LAT_PARAM = "latitude"
+LNG_PARAM = "longitude"
+SPAN_LAT_PARAM = "spanLat"
+SPAN_LNG_PARAM = "spanLng"
+
+
+def parse_bbox(text):
+    """Converte "sul,oeste,norte,leste" em uma tupla de floats (south, west, north, east)."""
+    parts = [float(value) for value in text.replace(";", ",").split(",")]
+    if len(parts) != 4:
+        raise ValueError(f"Bounding box inválido: {text!r} (use sul,oeste,norte,leste)")
+    south, west, north, east = parts
+    if south >= north or west >= east:
+        raise ValueError(f"Bounding box inválido: {text!r} (sul < norte e oeste < leste)")
+    return south, west, north, east
+
+
+def bbox_from_region_url(url):
+    """Extrai o bounding box (south, west, north, east) de uma URL `locations/region`, ou None."""
+    params = dict(parse_qsl(urlsplit(url).query))
+    try:
+        lat = float(params[LAT_PARAM])
+        lng = float(params[LNG_PARAM])
+        span_lat = float(params[SPAN_LAT_PARAM])
+        span_lng = float(params[SPAN_LNG_PARAM])
+    except (KeyError, ValueError):
+        return None
+    return lat - span_lat / 2, lng - span_lng / 2, lat + span_lat / 2, lng + span_lng / 2
+
+
+def region_url_for_bbox(template_url, bbox):
+    """Monta uma URL `locations/region` para o bbox, mantendo os demais parâmetros do modelo capturado."""
+    south, west, north, east = bbox
+    parts = urlsplit(template_url)
+    params = dict(parse_qsl(parts.query))
+    params[LAT_PARAM] = f"{(south + north) / 2:.6f}"
+    params[LNG_PARAM] = f"{(west + east) / 2:.6f}"
+    params[SPAN_LAT_PARAM] = f"{north - south:.6f}"
+    params[SPAN_LNG_PARAM] = f"{east - west:.6f}"
+    return urlunsplit(parts._replace(query=urlencode(params)))
+
+
+def region_fetcher(session, max_rate=0, timeout=30):
+    """DetailFetcher para respostas `locations/region`: mesmo limite de taxa e novas tentativas (429/503, Retry-After)."""
+    from .detailFetch import DetailFetcher  # o requests só é carregado por quem busca regiões
+
+    return DetailFetcher(session, workers=1, max_rate=max_rate, timeout=timeout, name="region")
+
+
+def fetch_region(session, region_url, fetcher=None):
+    """
+    Busca uma URL `locations/region` com a sessão do navegador e retorna a lista de
+    estabelecimentos, ou None se a requisição falhou depois das novas tentativas
+    (diferente de uma região vazia, que devolve lista vazia).
+    """
+    fetcher = fetcher or region_fetcher(session)
+    data = fetcher.fetch(region_url)
+    if data is None:
+        return None
+    return data if isinstance(data, list) else []
@@ -0,0 +1,120 @@
+import io
+import itertools
+import json
+
+# Campos de cada estabelecimento usados pelo pipeline; o resto do payload é descartado
+KEEP_FIELDS = ("id", "name", "url")
+
+# Nomes possíveis das coordenadas no payload, normalizados para "lat"/"lng"
+COORD_FIELDS = {"lat": ("lat", "latitude"), "lng": ("lng", "longitude")}
+
+WHITESPACE = " \t\n\r"
+
+
+def coordinates(est):
+    """Coordenadas do estabelecimento como {"lat", "lng"}, aceitando também "latitude"/"longitude"; vazio se não vierem."""
+    coords = {}
+    for field, names in COORD_FIELDS.items():
+        for name in names:
+            if est.get(name) is not None:
+                coords[field] = float(est[name])
+                break
+    return coords
+
+
+def slim_establishment(est):
+    """Mantém só id, nome, URL e coordenadas de um estabelecimento do payload."""
+    slim = {field: est[field] for field in KEEP_FIELDS if field in est}
+    slim.update(coordinates(est))
+    return slim
+
+
+def _skip_whitespace(text, index):
+    while index < len(text) and text[index] in WHITESPACE:
+        index += 1
+    return index
+
+
+def iter_json_array(text):
+    """
+    Percorre um array JSON no topo do texto e devolve os elementos um a um,
+    decodificando cada elemento só quando ele é pedido (json.JSONDecoder.raw_decode).
+    """
+    decoder = json.JSONDecoder()
+    index = _skip_whitespace(text, 0)
+    if text[index:index + 1] != "[":
+        raise ValueError("O payload não é um array JSON")
+    index = _skip_whitespace(text, index + 1)
+    if text[index:index + 1] == "]":
+        return
+
+    while True:
+        item, index = decoder.raw_decode(text, index)
+        yield item
+        index = _skip_whitespace(text, index)
+        separator = text[index:index + 1]
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Esperava `,` ou `]` na posição {index} do payload")
+        index = _skip_whitespace(text, index + 1)
+
+
+def _parse_errors():
+    """Exceções de um payload inválido: ValueError e, com o ijson instalado, os erros dele."""
+    try:
+        import ijson
+    except ImportError:
+        return (ValueError,)
+    return (ValueError, ijson.JSONError, ijson.IncompleteJSONError)
+
+
+def _iter_items(body):
+    try:
+        import ijson
+    except ImportError:
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        yield from iter_json_array(body)
+        return
+
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    yield from ijson.items(io.BytesIO(body), "item", use_float=True)
+
+
+def iter_establishments(body):
+    """
+    Devolve os estabelecimentos de um corpo `locations/region` um por vez, já
+    reduzidos a id, nome, URL e coordenadas.
+
+    Usa o ijson se estiver instalado; senão, decodifica elemento por elemento com
+    a biblioteca padrão. O primeiro estabelecimento sai antes do payload inteiro ser
+    decodificado. Um payload inválido interrompe a sequência com um aviso.
+    """
+    try:
+        for est in _iter_items(body):
+            if isinstance(est, dict):
+                yield slim_establishment(est)
+    except _parse_errors() as e:
+        print(f"⚠️ Payload de `locations/region` inválido: {e}")
+
+
+def as_establishments(payload):
+    """Estabelecimentos de um payload: o corpo bruto (str/bytes) é lido em stream; listas passam direto."""
+    if isinstance(payload, (str, bytes)):
+        return iter_establishments(payload)
+    return payload
+
+
+def has_establishments(body):
+    """True se o corpo bruto traz ao menos um estabelecimento (decodifica só o primeiro)."""
+    return body is not None and peek(iter_establishments(body))[0] is not None
+
+
+def peek(iterator):
+    """Lê o primeiro item sem perdê-lo: retorna (primeiro, iterador completo), ou (None, None) se vazio."""
+    iterator = iter(iterator)
+    for first in iterator:
+        return first, itertools.chain([first], iterator)
+    return None, None
@@ -0,0 +1,97 @@
+from collections import deque
+from urllib.parse import urlsplit, parse_qsl
+from .cityStore import station_key
+from .regionQuery import bbox_from_region_url, region_url_for_bbox, region_fetcher, fetch_region
+from .runMetrics import metrics
+
+# Parâmetro da URL `locations/region` com o máximo de resultados por resposta
+COUNT_PARAM = "count"
+
+# Não divide tiles menores que isto (graus), mesmo que continuem saturados
+MIN_SPAN = 0.002
+MAX_DEPTH = 8
+
+
+def region_cap(region_url, default=None):
+    """Limite de resultados por resposta: o parâmetro `count` da URL, ou `default`."""
+    try:
+        return int(dict(parse_qsl(urlsplit(region_url).query))[COUNT_PARAM])
+    except (KeyError, ValueError):
+        return default
+
+
+def split_bbox(bbox):
+    """Divide o bbox (south, west, north, east) em quatro quadrantes."""
+    south, west, north, east = bbox
+    mid_lat = (south + north) / 2
+    mid_lng = (west + east) / 2
+    return [
+        (south, west, mid_lat, mid_lng),
+        (south, mid_lng, mid_lat, east),
+        (mid_lat, west, north, mid_lng),
+        (mid_lat, mid_lng, north, east),
+    ]
+
+
+def tile_region(session, template_url, bbox, cap, root_results=None, max_depth=MAX_DEPTH, min_span=MIN_SPAN,
+                max_rate=0):
+    """
+    Cobre o bbox com uma quadtree de consultas `locations/region`.
+
+    Só os tiles cuja resposta atinge o limite `cap` são divididos em quatro, então
+    regiões esparsas custam uma requisição e as densas só se aprofundam onde é
+    preciso. `root_results` reaproveita a resposta já capturada para o bbox inteiro.
+
+    As consultas respeitam `max_rate` por segundo e tentam de novo em 429/503
+    (Retry-After). Um tile que falha mesmo assim é contado em `tiles_failed` no
+    relatório: a cobertura daquela área fica incompleta.
+    Retorna os estabelecimentos sem repetição (por id/URL).
+    """
+    fetcher = region_fetcher(session, max_rate)
+    stations = {}
+    queue = deque([(bbox, 0, root_results)])
+    requests_made = 0
+    failed = 0
+
+    while queue:
+        box, depth, results = queue.popleft()
+        if results is None:
+            results = fetch_region(session, region_url_for_bbox(template_url, box), fetcher)
+            requests_made += 1
+            if results is None:
+                print(f"⚠️ Tile {box} falhou; os estabelecimentos dessa área ficam de fora.")
+                failed += 1
+                continue
+
+        for est in results:
+            key = station_key(est) or f"name:{est.get('name')}"
+            stations.setdefault(key, est)
+
+        saturated = cap is not None and len(results) >= cap
+        too_small = (box[2] - box[0]) < min_span or (box[3] - box[1]) < min_span
+        if saturated and depth < max_depth and not too_small:
+            queue.extend((child, depth + 1, None) for child in split_bbox(box))
+        elif saturated:
+            print(f"⚠️ Tile {box} continua saturado ({len(results)} resultados) no limite de profundidade.")
+            metrics.count("tiles_saturated")
+
+    metrics.count("tile_requests", requests_made)
+    metrics.count("tiles_failed", failed)
+    print(f"🧩 {len(stations)} estabelecimentos únicos em {requests_made} requisições de tiles.")
+    if failed:
+        print(f"⚠️ {failed} tiles falharam: cobertura incompleta.")
+    return list(stations.values())
+
+
+def expand_region(session, region_url, establishments, default_cap=None, max_rate=0):
+    """
+    Completa uma resposta `locations/region` que atingiu o limite de resultados,
+    cobrindo o mesmo viewport com tiles. Se não atingiu, devolve a resposta como está.
+    """
+    cap = region_cap(region_url, default_cap)
+    bbox = bbox_from_region_url(region_url)
+    if cap is None or bbox is None or len(establishments) < cap:
+        return establishments
+
+    print(f"🧩 A resposta veio com {len(establishments)} resultados (limite {cap}); dividindo a região em tiles...")
+    return tile_region(session, region_url, bbox, cap, root_results=establishments, max_rate=max_rate)
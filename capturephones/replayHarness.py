@@ -0,0 +1,202 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+INDEX_NAME = "index.jsonl"
+BODIES_DIR = "bodies"
+
+
+def fixture_key(url):
+    """Chave de uma resposta gravada: caminho + query, sem esquema nem host."""
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+class Recorder:
+    """
+    Grava as respostas de uma sessão real (corpos de `locations/region`, JSON e
+    HTML de detalhes) como fixtures em `folder`, para serem servidas depois pelo
+    `ReplayServer`.
+
+    Cada resposta vira um arquivo em `bodies/` e uma linha em `index.jsonl`.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(os.path.join(folder, BODIES_DIR), exist_ok=True)
+        self._lock = threading.Lock()
+        self._index = open(os.path.join(folder, INDEX_NAME), "a", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, url, body, content_type, kind):
+        """Grava o corpo de uma resposta. `kind` é "region", "detail_json" ou "detail_html"."""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        filename = hashlib.sha1(f"{kind} {url}".encode("utf-8")).hexdigest() + ".body"
+        with open(os.path.join(self.folder, BODIES_DIR, filename), "wb") as f:
+            f.write(body)
+
+        entry = {"url": url, "key": fixture_key(url), "file": filename, "content_type": content_type, "kind": kind}
+        with self._lock:
+            self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index.flush()
+
+    def response_hook(self, response, *args, **kwargs):
+        """Hook para `requests.Session.hooks["response"]`: grava os JSONs de detalhes que passam pela sessão."""
+        if response.status_code == 200 and "json" in response.headers.get("Content-Type", ""):
+            # Grava pela URL pedida (antes de redirecionamentos), que é a que aparece no payload da região
+            url = response.history[0].url if response.history else response.url
+            self.record(url, response.content, response.headers["Content-Type"], "detail_json")
+        return response
+
+    def close(self):
+        with self._lock:
+            if not self._index.closed:
+                self._index.close()
+
+
+def load_fixtures(folder):
+    """
+    Carrega o índice de fixtures: {chave: {tipo: entrada}}. Uma mesma URL pode ter
+    JSON e HTML gravados; em gravações repetidas vale a última.
+    """
+    fixtures = {}
+    with open(os.path.join(folder, INDEX_NAME), "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                fixtures.setdefault(entry["key"], {})[entry["kind"]] = entry
+    return fixtures
+
+
+def pick_variant(variants, accept):
+    """Escolhe entre JSON e HTML gravados para a mesma URL conforme o cabeçalho Accept do pedido."""
+    if "json" in accept:
+        order = ("detail_json", "region", "detail_html")
+    else:
+        order = ("detail_html", "region", "detail_json")
+    for kind in order:
+        if kind in variants:
+            return variants[kind]
+    return None
+
+
+class ReplayServer:
+    """
+    Servidor HTTP local que responde com as fixtures gravadas pelo `Recorder`.
+
+    As URLs absolutas do PlugShare dentro dos corpos são reescritas para o próprio
+    servidor, então o código dos scanners segue os links de detalhes sem mudança.
+    `latency` (em segundos) simula o tempo de rede de cada resposta.
+    """
+
+    def __init__(self, folder, host="127.0.0.1", port=0, latency=0.0):
+        self.folder = folder
+        self.latency = latency
+        self.fixtures = load_fixtures(folder)
+        self.origins = sorted(
+            {
+                "{0.scheme}://{0.netloc}".format(urlsplit(entry["url"]))
+                for variants in self.fixtures.values() for entry in variants.values()
+            },
+            key=len, reverse=True,
+        )
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_port}"
+        self._bodies = {}
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def local_url(self, url):
+        """Converte uma URL gravada na URL equivalente deste servidor."""
+        return self.base_url + fixture_key(url)
+
+    def urls(self, kind=None):
+        """URLs originais gravadas (opcionalmente só de um tipo)."""
+        return [
+            entry["url"] for variants in self.fixtures.values() for entry in variants.values()
+            if kind is None or entry["kind"] == kind
+        ]
+
+    def body(self, entry):
+        """Corpo de uma fixture, com as origens reescritas para o servidor local (em cache na memória)."""
+        key = entry["file"]
+        if key not in self._bodies:
+            with open(os.path.join(self.folder, BODIES_DIR, entry["file"]), "rb") as f:
+                body = f.read()
+            for origin in self.origins:
+                body = body.replace(origin.encode("utf-8"), self.base_url.encode("utf-8"))
+            self._bodies[key] = body
+        return self._bodies[key]
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                entry = pick_variant(server.fixtures.get(self.path, {}), self.headers.get("Accept", ""))
+                if entry is None:
+                    self.send_error(404, "Fixture não gravada")
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                body = server.body(entry)
+                self.send_response(200)
+                self.send_header("Content-Type", entry["content_type"])
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve as fixtures gravadas de uma sessão do PlugShare.")
+    parser.add_argument("fixtures", help="pasta gravada com --record")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="atraso simulado por resposta, em segundos")
+    args = parser.parse_args(argv)
+
+    server = ReplayServer(args.fixtures, port=args.port, latency=args.latency)
+    print(f"🎞️ Servindo {len(server.fixtures)} respostas em {server.base_url}")
+    for url in server.urls("region"):
+        print(f"   region: {server.local_url(url)}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
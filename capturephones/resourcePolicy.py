@@ -0,0 +1,92 @@
+import re
+import weakref
+from .runMetrics import metrics
+
+# Padrões no formato do `Network.setBlockedURLs` do Chrome (`*` casa qualquer trecho)
+IMAGES = ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*"]
+FONTS = ["*.woff*", "*.ttf*", "*.otf*", "*.eot*", "*fonts.googleapis.com*", "*fonts.gstatic.com*"]
+MEDIA = ["*.mp4*", "*.webm*", "*.mp3*", "*.ogg*"]
+TRACKERS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*adservice.google.*", "*amazon-adsystem.com*", "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*",
+]
+MAP_TILES = ["*maps.googleapis.com/maps/vt*", "*maps.googleapis.com/maps/api/staticmap*", "*khms*.google.com*"]
+# Scripts de terceiros que a página de detalhes não precisa para mostrar o link `tel:`
+THIRD_PARTY_SCRIPTS = ["*maps.googleapis.com*", "*maps.gstatic.com*", "*apis.google.com*", "*platform.twitter.com*"]
+
+PRESETS = {
+    # Página de busca: o mapa e a API continuam carregando, para a requisição `locations/region` acontecer
+    "search": IMAGES + FONTS + MEDIA + TRACKERS + MAP_TILES,
+    # Página de detalhes: só o app do PlugShare e a API
+    "detail": IMAGES + FONTS + MEDIA + TRACKERS + MAP_TILES + THIRD_PARTY_SCRIPTS,
+}
+
+# Tamanho transferido de uma resposta no evento `Network.loadingFinished`
+ENCODED_LENGTH_RE = re.compile(r'"encodedDataLength"\s*:\s*([\d.]+)')
+
+
+class ResourcePolicy:
+    """
+    Bloqueia no Chrome (via CDP `Network.setBlockedURLs`) os recursos que não servem
+    para a varredura: imagens, tiles do mapa, fontes, mídia, rastreadores e, nas
+    páginas de detalhes, scripts de terceiros.
+
+    Cada tipo de página ("search" ou "detail") tem seu preset; `extra` acrescenta
+    padrões a todos e `allow` tira dos presets os padrões que contêm algum dos textos
+    informados. Com `enabled=False` nada é bloqueado, mas a economia continua medida.
+    """
+
+    def __init__(self, enabled=True, extra=(), allow=()):
+        self.enabled = enabled
+        self.patterns = {
+            page: [pattern for pattern in preset if not any(text in pattern for text in allow)] + list(extra)
+            for page, preset in PRESETS.items()
+        }
+        self._applied = weakref.WeakKeyDictionary()  # navegador -> {aba: tipo de página em vigor}
+
+    def apply(self, driver, page, handle=None):
+        """
+        Ativa o preset de `page` na aba atual do navegador (só chama o CDP quando o
+        tipo de página muda). Quem usa várias abas informa o `handle` da atual.
+        """
+        applied = self._applied.setdefault(driver, {})
+        if not self.enabled or applied.get(handle) == page:
+            return
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.patterns[page]})
+        applied[handle] = page
+
+    def measure(self, driver, prefix="page"):
+        """
+        Consome os eventos de rede acumulados no log de performance e soma nos
+        contadores `<prefix>_bytes`, `<prefix>_requests` e `<prefix>_requests_blocked`.
+        """
+        transferred = loaded = blocked = 0
+        for entry in driver.get_log("performance"):
+            raw = entry["message"]
+            if "Network.loadingFinished" in raw:
+                match = ENCODED_LENGTH_RE.search(raw)
+                if match:
+                    transferred += float(match.group(1))
+                loaded += 1
+            elif "Network.loadingFailed" in raw and '"blockedReason"' in raw:
+                blocked += 1
+
+        metrics.count(f"{prefix}_bytes", int(transferred))
+        metrics.count(f"{prefix}_requests", loaded)
+        metrics.count(f"{prefix}_requests_blocked", blocked)
+        return transferred, loaded, blocked
+
+
+def add_policy_arguments(parser):
+    """Adiciona as opções de bloqueio de recursos do Chrome."""
+    parser.add_argument("--block", choices=("on", "off"), default="on",
+                        help="bloqueia imagens, tiles, fontes, mídia, rastreadores e scripts de terceiros no Chrome")
+    parser.add_argument("--block-pattern", action="append", default=[], metavar="PADRÃO",
+                        help="padrão extra de URL a bloquear (ex.: '*cdn.exemplo.com*'); pode repetir")
+    parser.add_argument("--allow-pattern", action="append", default=[], metavar="TEXTO",
+                        help="libera os padrões dos presets que contêm este texto (ex.: maps.googleapis.com); pode repetir")
+
+
+def policy_from_args(args):
+    return ResourcePolicy(args.block == "on", args.block_pattern, args.allow_pattern)
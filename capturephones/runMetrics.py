@@ -0,0 +1,164 @@
+import cProfile
+import heapq
+import json
+import threading
+import time
+from contextlib import contextmanager
+from .atomicFile import write_atomic
+
+# Quantas estações mais lentas guardar no relatório
+SLOWEST_LIMIT = 20
+
+
+def percentile(sorted_values, p):
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples):
+    """Resumo de uma lista de durações (segundos): contagem, total, média e percentis."""
+    values = sorted(samples)
+    return {
+        "count": len(values),
+        "total": sum(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else None,
+    }
+
+
+class RunMetrics:
+    """
+    Cronômetros por etapa e contadores de uma varredura, seguros entre threads.
+
+    Uso:
+        with metrics.stage("page_load"):
+            driver.get(url)
+        metrics.count("phones_found")
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.stages = {}
+            self.counters = {}
+            self._slowest = []
+
+    @contextmanager
+    def stage(self, name):
+        """Mede a duração do bloco e acumula na etapa `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            self.stages.setdefault(name, []).append(seconds)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe_station(self, url, seconds):
+        """Registra o tempo total de uma estação, mantendo só as mais lentas."""
+        with self._lock:
+            entry = (seconds, url)
+            if len(self._slowest) < SLOWEST_LIMIT:
+                heapq.heappush(self._slowest, entry)
+            else:
+                heapq.heappushpop(self._slowest, entry)
+
+    def drain(self):
+        """Retorna as amostras e contadores acumulados (serializáveis) e zera tudo, para juntar em outro processo com `merge`."""
+        with self._lock:
+            data = {"stages": self.stages, "counters": self.counters, "slowest": self._slowest}
+            self.stages, self.counters, self._slowest = {}, {}, []
+            return data
+
+    def merge(self, data):
+        """Soma ao relatório o que veio do `drain` de outro processo."""
+        with self._lock:
+            for name, samples in data["stages"].items():
+                self.stages.setdefault(name, []).extend(samples)
+            for name, value in data["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for entry in data["slowest"]:
+                entry = tuple(entry)
+                if len(self._slowest) < SLOWEST_LIMIT:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heappushpop(self._slowest, entry)
+
+    def report(self):
+        """Monta o relatório da execução como um dict serializável em JSON."""
+        with self._lock:
+            finished_at = time.time()
+            return {
+                "started_at": self.started_at,
+                "finished_at": finished_at,
+                "duration": finished_at - self.started_at,
+                "stages": {name: summarize(samples) for name, samples in self.stages.items()},
+                "counters": dict(self.counters),
+                "slowest_stations": [
+                    {"url": url, "seconds": seconds} for seconds, url in sorted(self._slowest, reverse=True)
+                ],
+            }
+
+    def write_report(self, path):
+        """Grava o relatório JSON da execução."""
+        write_atomic(path, json.dumps(self.report(), ensure_ascii=False, indent=4))
+        return path
+
+    def write_prometheus(self, path, prefix="capturephones"):
+        """Grava as métricas no formato textfile do Prometheus (node_exporter)."""
+        report = self.report()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Duração das etapas da varredura.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for name, summary in sorted(report["stages"].items()):
+            for quantile in ("50", "90", "99"):
+                lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="0.{quantile}"}} {summary["p" + quantile]}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {summary["total"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {summary["count"]}')
+
+        lines += [
+            f"# HELP {prefix}_events_total Contadores da varredura (telefones encontrados, ausentes, falhas, novas tentativas...).",
+            f"# TYPE {prefix}_events_total counter",
+        ]
+        for name, value in sorted(report["counters"].items()):
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+
+        lines += [
+            f"# TYPE {prefix}_run_duration_seconds gauge",
+            f"{prefix}_run_duration_seconds {report['duration']}",
+            f"# TYPE {prefix}_run_finished_timestamp_seconds gauge",
+            f"{prefix}_run_finished_timestamp_seconds {report['finished_at']}",
+        ]
+        write_atomic(path, "\n".join(lines) + "\n")
+        return path
+
+
+def run_profiled(fn, path, *args, **kwargs):
+    """Executa `fn` sob o cProfile e grava as estatísticas em `path` (abra com `python -m pstats`)."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+        print(f"🧪 Perfil do cProfile salvo em `{path}`.")
+
+
+# Métricas da execução atual, compartilhadas pelos módulos do scanner
+metrics = RunMetrics()
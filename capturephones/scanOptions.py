@@ -0,0 +1,63 @@
+import os
+from .cityStore import FOLDER_NAME
+from .resourcePolicy import add_policy_arguments
+from .runMetrics import metrics
+
+# Opções de linha de comando das varreduras, num módulo sem o Selenium: `queue status`
+# e `queue enqueue` montam o mesmo argparse do worker sem carregar o navegador.
+
+# Relatório padrão da última execução (tempos por etapa e contadores)
+RUN_REPORT_PATH = os.path.join(FOLDER_NAME, ".run_report.json")
+
+# Estratégias de extração do telefone na página de detalhes (scanner.EXTRACTORS)
+EXTRACTOR_NAMES = ("observer", "legacy")
+
+
+def add_detail_arguments(parser):
+    """Adiciona as opções de captura e de busca dos telefones (compartilhadas com o worker da fila)."""
+    parser.add_argument("--mode", choices=("dom", "api"), default="dom",
+                        help="dom: abre cada página no Chrome; api: busca o JSON de detalhes e só abre a página se faltar telefone")
+    parser.add_argument("--extract", choices=EXTRACTOR_NAMES, default="observer",
+                        help="observer: um script observa o DOM e responde assim que a página fica pronta; "
+                             "legacy: esperas fixas do WebDriver (body, h1, 3.2s e link tel:)")
+    add_policy_arguments(parser)
+    parser.add_argument("--max-rate", type=float, default=2.0,
+                        help="máximo de requisições de detalhes por segundo no modo api (0 = sem limite)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="ignora o índice de estações e o cache de detalhes e busca tudo de novo")
+    parser.add_argument("--cache-ttl", type=float, default=7 * 24,
+                        help="validade das entradas do cache de detalhes (e das estações sem telefone no índice), em horas")
+    parser.add_argument("--tile", action="store_true",
+                        help="se a resposta de `locations/region` vier no limite de resultados, divide a região em tiles")
+    parser.add_argument("--tile-cap", type=int,
+                        help="limite de resultados por resposta, quando a URL capturada não traz o parâmetro `count`")
+    parser.add_argument("--full", action="store_true",
+                        help="processa todos os estabelecimentos, não só os novos desde a última varredura")
+    parser.add_argument("--report", default=RUN_REPORT_PATH,
+                        help="arquivo JSON com o relatório da execução (tempos por etapa e contadores)")
+    parser.add_argument("--prometheus", metavar="ARQUIVO",
+                        help="também grava as métricas no formato textfile do Prometheus")
+
+
+def add_scan_arguments(parser):
+    """Adiciona as opções da etapa de detalhes de uma varredura (compartilhadas com o modo em lote)."""
+    add_detail_arguments(parser)
+    parser.add_argument("--tabs", type=int, default=1,
+                        help="abas do Chrome carregando páginas de detalhes ao mesmo tempo (1 = sequencial)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="requisições simultâneas de detalhes no modo api")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma a varredura interrompida da cidade a partir do checkpoint, sem nova captura")
+    parser.add_argument("--checkpoint-every", type=int, default=25,
+                        help="grava o checkpoint a cada N estações salvas")
+    parser.add_argument("--record", metavar="PASTA",
+                        help="grava as respostas da sessão (região, JSON e HTML de detalhes) como fixtures para o comando `replay`")
+    parser.add_argument("--profile", metavar="ARQUIVO",
+                        help="roda o laço principal sob o cProfile e grava as estatísticas neste arquivo")
+
+
+def write_run_reports(args):
+    """Grava o relatório JSON da execução e, se pedido, o textfile do Prometheus."""
+    print(f"📊 Relatório da execução: {metrics.write_report(args.report)}")
+    if args.prometheus:
+        print(f"📊 Métricas Prometheus: {metrics.write_prometheus(args.prometheus)}")
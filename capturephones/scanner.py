@@ -0,0 +1,544 @@
+import argparse
+import time
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import SessionNotCreatedException, TimeoutException, WebDriverException
+from .driverPool import resolve_chromedriver
+from .regionCapture import RegionCapture
+from .regionStream import coordinates, has_establishments, iter_establishments
+from .regionTiler import expand_region
+from .detailCache import DetailCache
+from .stationIndex import StationIndex
+from .detailFetch import DetailFetcher, create_session, get_cookies_from_browser, extract_phone
+from .cityStore import CityStore, StationDiff, station_key
+from .checkpoint import Checkpoint
+from .replayHarness import Recorder
+from .resourcePolicy import policy_from_args
+from .scanOptions import EXTRACTOR_NAMES, add_scan_arguments, write_run_reports
+from .tabPipeline import TabPipeline
+from .runMetrics import metrics, run_profiled
+
+PLUGSHARE_URL = "https://www.plugshare.com/"
+
+# Valor salvo quando o telefone não aparece na página do estabelecimento
+PHONE_NOT_FOUND = "Telefone não encontrado"
+
+def setup_driver(headless=False):
+    """Configura o WebDriver do Chrome para acessar o PlugShare e capturar logs de rede."""
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1366,900")
+    # Abas em segundo plano continuam rodando JS normalmente (usado por --tabs)
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    try:
+        driver = webdriver.Chrome(
+            service=Service(resolve_chromedriver()),
+            options=chrome_options
+        )
+    except SessionNotCreatedException as e:
+        # O Chrome se atualizou e o chromedriver salvo ficou para trás: resolve de novo, uma vez
+        print(f"⚠️ O chromedriver salvo não abriu o Chrome ({e.msg}); resolvendo de novo...")
+        driver = webdriver.Chrome(
+            service=Service(resolve_chromedriver(refresh=True)),
+            options=chrome_options
+        )
+
+    # Limpa os logs de rede antes de começar
+    driver.get_log("performance")
+    return driver
+
+def inject_continue_button(driver):
+    """Injeta um botão visível na página para o usuário clicar e continuar."""
+    js_script = """
+    (function() {
+        var btn = document.createElement("button");
+        btn.innerHTML = "Continuar";
+        btn.style.position = "fixed";
+        btn.style.bottom = "20px";
+        btn.style.right = "20px";
+        btn.style.padding = "15px 30px";
+        btn.style.fontSize = "18px";
+        btn.style.fontWeight = "bold";
+        btn.style.backgroundColor = "#FF5722";
+        btn.style.color = "white";
+        btn.style.border = "none";
+        btn.style.borderRadius = "8px";
+        btn.style.cursor = "pointer";
+        btn.style.zIndex = "999999";  
+        btn.style.opacity = "1";  
+        btn.style.boxShadow = "0px 4px 10px rgba(0, 0, 0, 0.3)";
+        btn.id = "continueButton";
+        document.body.appendChild(btn);
+        
+        btn.onclick = function() {
+            btn.innerHTML = "Aguardando...";
+            btn.disabled = true;
+            window.continueScript = true;
+        };
+    })();
+    """
+    driver.execute_script(js_script)
+
+def wait_for_user_click(driver):
+    """Espera até que o usuário clique no botão para continuar."""
+    print("🔹 Clique no botão 'Continuar' na página do PlugShare para prosseguir.")
+    while True:
+        result = driver.execute_script("return window.continueScript || false;")
+        if result:
+            break
+        time.sleep(1)
+    print("✅ Usuário clicou no botão. Continuando o fluxo.")
+
+def wait_for_user_idle(driver, idle=10):
+    """
+    Aguarda o usuário digitar a cidade e ficar `idle` segundos sem mexer no mouse
+    nem no teclado (o fluxo dos antigos scanPerCityv2/v3). Precisa do pynput.
+    """
+    from pynput import mouse, keyboard
+
+    last_activity = [time.time()]
+
+    def on_activity(*args):
+        last_activity[0] = time.time()
+
+    listeners = [mouse.Listener(on_move=on_activity, on_click=on_activity), keyboard.Listener(on_press=on_activity)]
+    for listener in listeners:
+        listener.start()
+
+    try:
+        print(f"Digite a cidade no PlugShare. O script continuará após {idle} segundos de inatividade.")
+        search_box = driver.find_element(By.CSS_SELECTOR, 'input[type="search"]')
+        while not search_box.get_attribute("value").strip():
+            time.sleep(1)
+
+        print("Pesquisa detectada. Aguardando inatividade...")
+        while time.time() - last_activity[0] < idle:
+            time.sleep(1)
+    finally:
+        for listener in listeners:
+            listener.stop()
+
+    # Aguarda o usuário clicar em uma cidade para gerar a URL correta
+    try:
+        WebDriverWait(driver, 15).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "a[data-testid='location-link']"))
+        )
+        print("Cidade selecionada. Continuando o fluxo.")
+    except TimeoutException:
+        print("⚠️ A cidade não foi selecionada corretamente. Verifique se você clicou na cidade.")
+
+def plugshare_cookies(driver):
+    """
+    Cookies da sessão do PlugShare no navegador, abrindo o site antes se ele ainda
+    não foi visitado (um navegador novo do pool não tem os cookies e a API responde 401).
+    """
+    if not driver.current_url.startswith(PLUGSHARE_URL):
+        driver.get(PLUGSHARE_URL)
+    return get_cookies_from_browser(driver)
+
+def get_city_name(driver):
+    """Obtém o nome da cidade digitada no campo de pesquisa."""
+    try:
+        search_box = driver.find_element(By.CSS_SELECTOR, 'input[type="search"]')
+        city_name = search_box.get_attribute("value").strip()
+        return city_name if city_name else "Cidade_Desconhecida"
+    except:
+        return "Cidade_Desconhecida"
+
+def extract_latest_establishments_from_logs(driver, timeout=20, recorder=None, tile=False, tile_cap=None):
+    """
+    Captura a última requisição `locations/region` assim que o carregamento dela termina.
+
+    Retorna o corpo bruto da resposta, do qual `process_city` lê os estabelecimentos
+    (id, nome, URL e coordenadas) um a um, para que a busca de detalhes comece antes
+    do payload inteiro ser decodificado; ou None se nada foi capturado.
+
+    Com `tile`, se a resposta veio cortada no limite de resultados, o mesmo viewport
+    é coberto com tiles menores (regionTiler.py) usando os cookies do navegador, e a
+    lista completa é retornada.
+    """
+    print("🔍 Capturando a última requisição de `locations/region` nos logs de rede...")
+
+    capture = RegionCapture(driver, recorder=recorder)
+    body = capture.wait_for_latest_body(timeout)
+
+    if not has_establishments(body):
+        print("❌ Não foi possível capturar os estabelecimentos corretos.")
+        return None
+
+    if tile:
+        session = create_session(get_cookies_from_browser(driver))
+        return expand_region(session, capture.latest_url, list(iter_establishments(body)), tile_cap)
+
+    return body
+
+def extract_phone_from_page(driver):
+    """Obtém o número de telefone de um estabelecimento carregado na página."""
+    print("📞 Tentando capturar o telefone...")
+
+    try:
+        # Espera o carregamento total da página antes de tentar capturar o telefone
+        with metrics.stage("wait_page"):
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.TAG_NAME, "h1"))
+            )
+        print("✅ Página carregada com sucesso.")
+        
+        # Aguarda 2 segundos antes de capturar o telefone (garante carregamento completo)
+        with metrics.stage("fixed_sleep"):
+            time.sleep(3.2)
+
+        # Espera a presença do telefone na página (até 10s)
+        with metrics.stage("wait_tel"):
+            phone_element = WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.XPATH, "//a[contains(@href, 'tel:')]"))
+            )
+        phone_number = phone_element.text.strip()
+        if phone_number:
+            print(f"✅ Número encontrado: {phone_number}")
+            return phone_number
+
+    except TimeoutException:
+        print("⚠️ O número de telefone via `<a href='tel:'>` não foi encontrado.")
+    except Exception as e:
+        metrics.count("extract_errors")
+        print(f"⚠️ Erro ao procurar o telefone na página: {e}")
+
+    return PHONE_NOT_FOUND
+
+# Script assíncrono injetado na página de detalhes: observa o DOM e responde assim que
+# o link `tel:` aparece, ou quando o painel terminou de renderizar sem telefone
+# (documento carregado, <h1> presente e nenhuma mutação por `quietMs`).
+OBSERVE_PHONE_JS = """
+var done = arguments[arguments.length - 1];
+var timeoutMs = arguments[0], quietMs = arguments[1];
+var finished = false, quietTimer = null, observer = null, hardTimer = null;
+
+function snapshot(status) {
+    var link = document.querySelector("a[href*='tel:']");
+    var title = document.querySelector("h1");
+    var phone = null;
+    if (link) {
+        phone = (link.textContent || "").trim() || link.getAttribute("href").replace(/^.*tel:/, "");
+    }
+    return {status: status, phone: phone, name: title ? title.textContent.trim() : null};
+}
+
+function finish(status) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(hardTimer);
+    done(snapshot(status));
+}
+
+function check() {
+    if (document.querySelector("a[href*='tel:']")) {
+        finish("found");
+        return;
+    }
+    if (document.readyState === "complete" && document.querySelector("h1")) {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(function() { finish("missing"); }, quietMs);
+    }
+}
+
+hardTimer = setTimeout(function() { finish("timeout"); }, timeoutMs);
+observer = new MutationObserver(check);
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, attributeFilter: ["href"]});
+window.addEventListener("load", check);
+check();
+"""
+
+def observe_station_page(driver, timeout=15, quiet=1.5):
+    """
+    Injeta `OBSERVE_PHONE_JS` e retorna {"status", "phone", "name"} em uma única chamada
+    assíncrona. `status` é "found", "missing" (painel pronto sem telefone) ou "timeout".
+    """
+    driver.set_script_timeout(timeout + 5)
+    return driver.execute_async_script(OBSERVE_PHONE_JS, int(timeout * 1000), int(quiet * 1000))
+
+def extract_phone_with_observer(driver):
+    """Obtém o telefone da página com o MutationObserver, sem esperas fixas."""
+    print("📞 Observando a página até o telefone aparecer...")
+
+    try:
+        with metrics.stage("observe_page"):
+            result = observe_station_page(driver)
+    except Exception as e:
+        metrics.count("extract_errors")
+        print(f"⚠️ Erro ao observar a página: {e}")
+        return PHONE_NOT_FOUND
+
+    metrics.count(f"observer_{result['status']}")
+    if result["status"] == "found" and result["phone"]:
+        print(f"✅ Número encontrado: {result['phone']}")
+        return result["phone"]
+
+    print(f"⚠️ Telefone não encontrado em `{result['name']}` ({result['status']}).")
+    return PHONE_NOT_FOUND
+
+# Estratégias de extração do telefone na página de detalhes (nomes em scanOptions.EXTRACTOR_NAMES)
+EXTRACTORS = dict(zip(EXTRACTOR_NAMES, (extract_phone_with_observer, extract_phone_from_page)))
+
+def fetch_phone(driver, detail_url, details=None, extract=extract_phone_with_observer, policy=None):
+    """
+    Obtém o telefone de um estabelecimento e retorna (telefone, origem).
+
+    Usa o JSON de detalhes já buscado pela API quando ele traz telefone; caso
+    contrário carrega a página no Chrome e procura o link `tel:` com `extract`.
+    Com uma `policy` (resourcePolicy.ResourcePolicy), a página carrega sem os
+    recursos pesados e o tráfego dela entra nas métricas.
+    """
+    phone = extract_phone(details)
+    if phone:
+        print(f"✅ Número encontrado via API: {phone}")
+        return phone, "api"
+    if details is not None:
+        print("⚠️ JSON de detalhes sem telefone, recorrendo à página...")
+
+    if policy is not None:
+        policy.apply(driver, "detail")
+    with metrics.stage("page_load"):
+        driver.get(detail_url)
+    phone = extract(driver)
+    if policy is not None:
+        policy.measure(driver)
+    return phone, "dom"
+
+def save_partial_result(store, name, phone, **fields):
+    """
+    Salva um resultado no journal append-only da cidade (`numPerCity/<cidade>.jsonl`).
+
+    O arquivo `numPerCity/<cidade>.json` no formato {"city", "establishments", "numbers"}
+    é regenerado por `store.compact()` ao final da varredura.
+    """
+    store.append(name, phone, **fields)
+    print(f"✅ Salvo em `{store.journal_path}`: {name} - {phone}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Captura os telefones dos estabelecimentos do PlugShare por cidade.")
+    parser.add_argument("--wait", choices=("button", "idle"), default="button",
+                        help="button: botão \"Continuar\" na página; idle: segue após o usuário ficar inativo (precisa do pynput)")
+    add_scan_arguments(parser)
+    return parser.parse_args(argv)
+
+def iter_targets(establishments, index, cache, refresh=False, max_missing_age=0, changed=()):
+    """
+    Converte o fluxo de estabelecimentos em alvos (id, nome, url, telefone conhecido, coordenadas).
+
+    O telefone conhecido é (telefone, origem) vindo do índice global de estações
+    ("index", já visitada em outra cidade ou varredura) ou do cache de detalhes
+    ("cache"), consultados item a item; é None quando o telefone precisa ser buscado,
+    como nas estações em `changed` (StationDiff.changed: nome ou posição mudou).
+    As coordenadas são um dict {"lat", "lng"} (vazio se o payload não as trouxe).
+    """
+    for est in establishments:
+        name = est.get("name", "Nome não encontrado")
+        detail_url = est.get("url", "")
+        if not detail_url:
+            print(f"⚠️ Sem URL para {name}, pulando...")
+            continue
+
+        known = None
+        if not refresh and station_key(est) not in changed:
+            indexed = index.get(est, max_missing_age)
+            if indexed is not None:
+                known = (indexed["phone"] or PHONE_NOT_FOUND, "index")
+            else:
+                entry = cache.get(detail_url)
+                if entry and entry["phone"]:
+                    known = (entry["phone"], "cache")
+        yield est.get("id"), name, detail_url, known, coordinates(est)
+
+def process_city(driver, city_name, establishments, args, recorder=None):
+    """
+    Busca os telefones dos estabelecimentos de uma cidade e salva no journal da cidade.
+
+    `establishments` pode ser uma lista ou o corpo bruto de `locations/region`
+    (RegionCapture.wait_for_latest_body), lido em stream. O payload é gravado num
+    checkpoint (checkpoint.py) junto com as estações já salvas, em lotes; com
+    `establishments=None`, a varredura é retomada do checkpoint da cidade, relendo o
+    corpo gravado em stream e pulando as estações já processadas.
+
+    Com um `recorder`, os JSONs de detalhes e o HTML das páginas abertas no Chrome
+    também são gravados como fixtures.
+
+    Retorna o caminho do arquivo `numPerCity/<cidade>.json` compactado ao final.
+    """
+    checkpoint = Checkpoint(city_name, batch_size=args.checkpoint_every)
+    done = set()
+    if establishments is None:
+        establishments, done = checkpoint.resume()
+        print(f"⏯️ Retomando {city_name}: {len(done)} estabelecimentos já processados.")
+    else:
+        establishments = checkpoint.start(establishments)
+
+    try:
+        filename = _process_targets(driver, city_name, establishments, done, checkpoint, args, recorder)
+    finally:
+        # O journal já foi sincronizado ao fechar; as chaves pendentes podem ir para o checkpoint
+        checkpoint.flush()
+        checkpoint.close()
+
+    checkpoint.finish()
+    return filename
+
+def _process_targets(driver, city_name, establishments, done, checkpoint, args, recorder=None):
+    """Laço de `process_city`: diff, índice/cache, detalhes e journal, marcando o checkpoint em lotes."""
+    processed_count = 0
+    target_count = 0
+    cached_count = 0
+
+    policy = policy_from_args(args)
+
+    with DetailCache(ttl=args.cache_ttl * 3600) as cache, StationIndex() as index, CityStore(city_name) as store:
+        diff = None
+        if not args.full:
+            diff = StationDiff(store.stations())
+            establishments = diff.filter(establishments)
+        if done:
+            establishments = (est for est in establishments if station_key(est) not in done)
+
+        targets = iter_targets(establishments, index, cache, args.refresh, args.cache_ttl * 3600,
+                               diff.changed if diff is not None else ())
+        if args.mode == "api":
+            session = create_session(get_cookies_from_browser(driver), pool_size=args.workers)
+            if recorder is not None:
+                session.hooks["response"].append(recorder.response_hook)
+            fetcher = DetailFetcher(session, workers=args.workers, max_rate=args.max_rate,
+                                    cache=cache, refresh=args.refresh)
+            resolved = fetcher.pipeline(targets, lambda target: None if target[3] else target[2])
+        else:
+            resolved = ((target, None) for target in targets)
+
+        # Navegador de um DriverPool (modo em lote): é reciclado no meio da cidade se passar dos limites
+        pool = getattr(driver, "pool", None)
+        tabs = None
+        if args.tabs > 1:
+            # Páginas sem telefone conhecido nem no JSON de detalhes carregam em abas paralelas
+            tabs = TabPipeline(driver, args.tabs, EXTRACTORS[args.extract], policy, pool=pool)
+            resolved = tabs.pipeline(
+                resolved, lambda item: None if item[0][3] or extract_phone(item[1]) else item[0][2]
+            )
+        else:
+            resolved = ((item, None) for item in resolved)
+
+        try:
+            while True:
+                started = time.perf_counter()
+                with metrics.stage("detail_wait"):
+                    item = next(resolved, None)
+                if item is None:
+                    break
+                ((est_id, name, detail_url, known, coords), details), page_phone = item
+                target_count += 1
+                if tabs is not None:
+                    driver = tabs.driver  # pode ter sido reciclado pelas abas
+
+                if known:
+                    phone, source = known
+                    cached_count += 1
+                else:
+                    if page_phone is not None:
+                        print(f"🔍 Lido na aba {name}: {detail_url}")
+                        phone, source = page_phone, "dom"
+                    else:
+                        print(f"🔍 Acessando {name}: {detail_url}")
+                        if pool is not None and tabs is None:
+                            driver = pool.recycle_if_needed(driver)
+                        try:
+                            phone, source = fetch_phone(driver, detail_url, details, EXTRACTORS[args.extract], policy)
+                        except WebDriverException as e:
+                            metrics.count("phones_failed")
+                            print(f"❌ Falha no navegador ao processar {name}: {e}")
+                            continue
+                    # Lido no DOM (aba ou sequencial): a aba ativa é a página desta estação
+                    if source == "dom" and recorder is not None:
+                        recorder.record(detail_url, driver.page_source, "text/html; charset=utf-8", "detail_html")
+                    if source == "dom" and phone != PHONE_NOT_FOUND:
+                        cache.put(detail_url, phone, details)
+
+                with metrics.stage("save"):
+                    save_partial_result(store, name, phone, id=est_id, url=detail_url, source=source, **coords)
+                    if source != "index":
+                        index.put(city_name, name, phone, id=est_id, url=detail_url, source=source)
+                    if checkpoint.mark(station_key({"id": est_id, "url": detail_url})):
+                        store.sync()
+                        checkpoint.flush()
+
+                metrics.count(f"source_{source}")
+                metrics.count("phones_missing" if phone == PHONE_NOT_FOUND else "phones_found")
+                metrics.observe_station(detail_url, time.perf_counter() - started)
+                processed_count += 1
+        finally:
+            if tabs is not None:
+                tabs.close()
+
+        if diff is not None:
+            removed = diff.removed()
+            store.mark_stale(removed)
+            store.mark_stale(diff.revived, stale=False)
+            print(f"🆕 {diff.added_count} novos ou alterados, {len(removed)} removidos desde a última varredura.")
+
+    print(f"♻️ {cached_count} telefones reaproveitados do índice de estações e do cache.")
+    print(f"✅ Processamento concluído: {processed_count}/{target_count} estabelecimentos salvos.")
+    filename = store.compact()
+    print(f"💾 Arquivo compactado: {filename}")
+    return filename
+
+def main(argv=None):
+    args = parse_args(argv)
+    recorder = Recorder(args.record) if args.record else None
+    driver = setup_driver()
+    policy_from_args(args).apply(driver, "search")
+    driver.get(PLUGSHARE_URL)
+    time.sleep(3)  # Aguarda o carregamento inicial da página
+
+    try:
+        if args.wait == "idle":
+            wait_for_user_idle(driver)
+        else:
+            inject_continue_button(driver)  # Adiciona o botão "Continuar" na página
+            wait_for_user_click(driver)       # Aguarda o usuário clicar no botão "Continuar"
+
+        city_name = get_city_name(driver)  # Obtém o nome da cidade digitada
+        print(f"🏙️ Cidade capturada: {city_name}")
+
+        if args.resume and Checkpoint(city_name).exists():
+            establishments = None  # process_city retoma do checkpoint
+        else:
+            with metrics.stage("region_capture"):
+                establishments = extract_latest_establishments_from_logs(
+                    driver, recorder=recorder, tile=args.tile, tile_cap=args.tile_cap)
+
+            if establishments is None:
+                print("❌ Nenhum estabelecimento encontrado.")
+                return
+
+        if args.profile:
+            run_profiled(process_city, args.profile, driver, city_name, establishments, args, recorder)
+        else:
+            process_city(driver, city_name, establishments, args, recorder)
+
+    finally:
+        driver.quit()
+        if recorder is not None:
+            recorder.close()
+        write_run_reports(args)
+
+if __name__ == "__main__":
+    main()
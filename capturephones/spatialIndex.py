@@ -0,0 +1,307 @@
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from .atomicFile import write_atomic
+from .cityStore import FOLDER_NAME, city_files, load_city
+
+INDEX_PATH = os.path.join(FOLDER_NAME, ".spatial_index.bin")
+
+# Lado de cada célula da grade, em graus (~5,5 km de latitude)
+DEFAULT_CELL_SIZE = 0.05
+EARTH_RADIUS_KM = 6371.0088
+
+MAGIC = b"CPSG"
+VERSION = 1
+# magic, versão, estações, células, lado da célula
+HEADER = struct.Struct("<4sIIId")
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Distância em km entre dois pontos (lat/lng em graus)."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _columns(cell_size):
+    return math.ceil(360 / cell_size)
+
+
+def _cell(lat, lng, cell_size):
+    """Linha e coluna da célula que contém o ponto."""
+    row = int((lat + 90) // cell_size)
+    col = min(int((lng + 180) // cell_size), _columns(cell_size) - 1)
+    return row, col
+
+
+def _padding(offset):
+    return -offset % 8
+
+
+def build_index(stations, path=INDEX_PATH, cell_size=DEFAULT_CELL_SIZE):
+    """
+    Grava o índice espacial das estações em `path`. `stations` é uma sequência
+    de dicts com "lat" e "lng" (e o que mais deve voltar nas consultas).
+
+    O arquivo é uma grade de células de `cell_size` graus: as estações ficam
+    ordenadas pela célula (linha * colunas + coluna), com as chaves das células
+    ocupadas e onde cada uma começa. Assim, as células de uma faixa de colunas
+    da mesma linha são contíguas no arquivo, e uma consulta lê só as faixas que
+    cruzam a área pedida. Os dados de cada estação vão em JSON ao final e só são
+    decodificados para as estações devolvidas. Retorna o número de estações.
+    """
+    columns = _columns(cell_size)
+    points = []
+    for station in stations:
+        lat, lng = station.get("lat"), station.get("lng")
+        if lat is None or lng is None:
+            continue
+        row, col = _cell(lat, lng, cell_size)
+        points.append((row * columns + col, lat, lng, station))
+    points.sort(key=lambda point: point[0])
+
+    keys, starts = [], []
+    for position, (key, _, _, _) in enumerate(points):
+        if not keys or keys[-1] != key:
+            keys.append(key)
+            starts.append(position)
+    starts.append(len(points))
+
+    blob, offsets = bytearray(), [0]
+    for _, _, _, station in points:
+        blob += json.dumps(station, ensure_ascii=False).encode("utf-8")
+        offsets.append(len(blob))
+
+    header = HEADER.pack(MAGIC, VERSION, len(points), len(keys), cell_size)
+    parts = [
+        header,
+        struct.pack(f"<{len(keys)}q", *keys),
+        struct.pack(f"<{len(starts)}I", *starts),
+    ]
+    parts.append(b"\0" * _padding(sum(map(len, parts))))
+    parts += [
+        struct.pack(f"<{len(points)}d", *(lat for _, lat, _, _ in points)),
+        struct.pack(f"<{len(points)}d", *(lng for _, _, lng, _ in points)),
+        struct.pack(f"<{len(offsets)}Q", *offsets),
+        bytes(blob),
+    ]
+
+    write_atomic(path, parts)
+    return len(points)
+
+
+def iter_city_stations(folder=FOLDER_NAME):
+    """Estações com coordenadas de todas as cidades salvas, no formato gravado no índice."""
+    for path in city_files(folder):
+        try:
+            city, stations = load_city(path)
+        except Exception as e:
+            print(f"⚠️ Ignorando {path}: {e}")
+            continue
+        for key, record in stations.items():
+            if record.get("lat") is None or record.get("lng") is None:
+                continue
+            yield {
+                "key": key, "city": city, "name": record.get("name"), "phone": record.get("phone"),
+                "url": record.get("url"), "stale": record.get("stale", False),
+                "lat": record["lat"], "lng": record["lng"],
+            }
+
+
+class SpatialIndex:
+    """
+    Consultas geográficas (raio, bbox e k vizinhos mais próximos) sobre o índice
+    gravado por `build_index`.
+
+    O arquivo é aberto via mmap e as colunas são lidas direto dele (memoryview),
+    sem carregar nada na memória: abrir o índice é instantâneo e uma consulta
+    toca só as células da área pedida.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, cells, self.cell_size = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"`{path}` não é um índice espacial válido (versão {VERSION}).")
+
+        self.count = count
+        self._columns = _columns(self.cell_size)
+        view = memoryview(self._map)
+        offset = HEADER.size
+        self._keys = view[offset:offset + 8 * cells].cast("q")
+        offset += 8 * cells
+        self._starts = view[offset:offset + 4 * (cells + 1)].cast("I")
+        offset += 4 * (cells + 1)
+        offset += _padding(offset)
+        self._lats = view[offset:offset + 8 * count].cast("d")
+        offset += 8 * count
+        self._lngs = view[offset:offset + 8 * count].cast("d")
+        offset += 8 * count
+        self._offsets = view[offset:offset + 8 * (count + 1)].cast("Q")
+        self._blob = offset + 8 * (count + 1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def station(self, position):
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return json.loads(self._map[self._blob + start:self._blob + end])
+
+    def _positions(self, south, west, north, east):
+        """Posições das estações das células que cruzam o bbox (pode incluir pontos fora dele)."""
+        if west > east:  # bbox cruzando o antimeridiano
+            yield from self._positions(south, west, north, 180.0)
+            yield from self._positions(south, -180.0, north, east)
+            return
+        south, north = max(south, -90.0), min(north, 90.0)
+        west, east = max(west, -180.0), min(east, 180.0)
+        first_row, first_col = _cell(south, west, self.cell_size)
+        last_row, last_col = _cell(north, east, self.cell_size)
+        for row in range(first_row, last_row + 1):
+            base = row * self._columns
+            low = bisect_left(self._keys, base + first_col)
+            high = bisect_right(self._keys, base + last_col, low)
+            if low < high:
+                yield from range(self._starts[low], self._starts[high])
+
+    def bbox(self, south, west, north, east):
+        """Estações dentro do bounding box (sul, oeste, norte, leste)."""
+        lats, lngs = self._lats, self._lngs
+        inside_lng = (lambda lng: lng >= west or lng <= east) if west > east else (lambda lng: west <= lng <= east)
+        return [
+            self.station(position) for position in self._positions(south, west, north, east)
+            if south <= lats[position] <= north and inside_lng(lngs[position])
+        ]
+
+    def _within(self, lat, lng, radius_km):
+        """Pares (distância, posição) das estações a até `radius_km` do ponto."""
+        angle = radius_km / EARTH_RADIUS_KM
+        dlat = math.degrees(angle)
+        if abs(lat) + dlat >= 90:
+            # O círculo contém um dos polos: todas as longitudes, até o polo
+            south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+            south, north = (south, 90.0) if lat > 0 else (-90.0, north)
+            west, east = -180.0, 180.0
+        else:
+            # Maior desvio de longitude num círculo na esfera (não o da projeção plana)
+            dlng = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+            south, north = lat - dlat, lat + dlat
+            west, east = lng - dlng, lng + dlng
+            west = west + 360 if west < -180 else west
+            east = east - 360 if east > 180 else east
+
+        found = []
+        for position in self._positions(south, west, north, east):
+            distance = haversine_km(lat, lng, self._lats[position], self._lngs[position])
+            if distance <= radius_km:
+                found.append((distance, position))
+        return found
+
+    def _with_distance(self, pairs):
+        results = []
+        for distance, position in sorted(pairs):
+            station = self.station(position)
+            station["distance_km"] = round(distance, 3)
+            results.append(station)
+        return results
+
+    def radius(self, lat, lng, radius_km, limit=None):
+        """Estações a até `radius_km` do ponto, da mais próxima para a mais distante."""
+        return self._with_distance(self._within(lat, lng, radius_km))[:limit]
+
+    def nearest(self, lat, lng, k=10):
+        """
+        As `k` estações mais próximas do ponto. Procura num raio do tamanho de
+        uma célula e vai dobrando até achar `k` estações dentro dele (as de fora
+        do raio podem estar mais perto que as dos cantos do bbox, então não contam).
+        """
+        k = min(k, self.count)
+        radius_km = math.radians(self.cell_size) * EARTH_RADIUS_KM
+        while True:
+            found = self._within(lat, lng, radius_km)
+            if len(found) >= k or radius_km >= math.pi * EARTH_RADIUS_KM:
+                return self._with_distance(sorted(found)[:k])
+            radius_km *= 2
+
+    def close(self):
+        for view in (self._keys, self._starts, self._lats, self._lngs, self._offsets):
+            view.release()
+        self._map.close()
+        self._file.close()
+
+
+def parse_geo_bbox(text):
+    """
+    Converte "sul,oeste,norte,leste" em (south, west, north, east). Diferente do
+    `regionQuery.parse_bbox`, aceita oeste > leste (bbox cruzando o antimeridiano).
+    """
+    parts = [float(value) for value in text.replace(";", ",").split(",")]
+    if len(parts) != 4:
+        raise ValueError(f"Bounding box inválido: {text!r} (use sul,oeste,norte,leste)")
+    south, west, north, east = parts
+    if south >= north:
+        raise ValueError(f"Bounding box inválido: {text!r} (sul < norte)")
+    return south, west, north, east
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice espacial das estações: consultas por raio, bbox e vizinhos mais próximos.")
+    parser.add_argument("--folder", default=FOLDER_NAME, help="pasta com os arquivos <cidade>.json")
+    parser.add_argument("--index", default=None,
+                        help=f"arquivo do índice (padrão: <folder>/{os.path.basename(INDEX_PATH)})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="(re)constrói o índice a partir de todas as cidades salvas")
+    build.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE, help="lado das células da grade, em graus")
+
+    radius = commands.add_parser("radius", help="estações a até N km de um ponto")
+    radius.add_argument("lat", type=float)
+    radius.add_argument("lng", type=float)
+    radius.add_argument("km", type=float)
+    radius.add_argument("--limit", type=int, default=None)
+
+    bbox = commands.add_parser("bbox", help="estações dentro de um bounding box")
+    bbox.add_argument("bbox", type=parse_geo_bbox,
+                      help="sul,oeste,norte,leste (com valores negativos, use `bbox -- -30,-54,-29,-53`)")
+
+    near = commands.add_parser("near", help="as k estações mais próximas de um ponto")
+    near.add_argument("lat", type=float)
+    near.add_argument("lng", type=float)
+    near.add_argument("-k", type=int, default=10)
+
+    args = parser.parse_args(argv)
+    path = args.index or os.path.join(args.folder, os.path.basename(INDEX_PATH))
+
+    if args.command == "build":
+        count = build_index(iter_city_stations(args.folder), path, args.cell_size)
+        print(f"✅ {count} estações com coordenadas indexadas em `{path}`.")
+        return
+
+    if not os.path.exists(path):
+        raise SystemExit(f"❌ Índice `{path}` não encontrado; rode `capturephones geo build` antes.")
+
+    with SpatialIndex(path) as index:
+        if args.command == "radius":
+            results = index.radius(args.lat, args.lng, args.km, args.limit)
+        elif args.command == "bbox":
+            results = index.bbox(*args.bbox)
+        else:
+            results = index.nearest(args.lat, args.lng, args.k)
+
+    for station in results:
+        distance = f" ({station['distance_km']} km)" if "distance_km" in station else ""
+        print(f"📍 {station['city']}: {station['name']} - {station['phone']}{distance}")
+    print(f"✅ {len(results)} estações.")
+
+
+if __name__ == "__main__":
+    main()
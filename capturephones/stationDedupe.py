@@ -0,0 +1,213 @@
+import argparse
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from .cityStore import FOLDER_NAME, city_files, load_city, write_json_atomic
+from .phoneNormalize import normalize_numbers
+
+CLUSTERS_PATH = os.path.join(FOLDER_NAME, "station_clusters.json")
+
+# Similaridade mínima entre nomes da mesma cidade para considerar a mesma estação
+DEFAULT_THRESHOLD = 0.5
+# Palavras em mais estações do que isso (na mesma cidade) não servem de bloco: gerariam pares demais
+MAX_BLOCK = 200
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(("de", "da", "do", "das", "dos", "e", "em", "na", "no", "the", "and"))
+
+
+def fold_names(names):
+    """
+    Todos os nomes em minúsculas e sem acentos, processados como um único bloco
+    de texto (uma linha por nome), sem laço Python por caractere.
+    """
+    block = "\n".join((name or "").replace("\n", " ") for name in names)
+    block = unicodedata.normalize("NFKD", block).encode("ascii", "ignore").decode("ascii").casefold()
+    return block.split("\n") if names else []
+
+
+def name_tokens(folded):
+    """Palavras de um nome já normalizado, sem as palavras vazias."""
+    return frozenset(TOKEN_RE.findall(folded)).difference(STOPWORDS)
+
+
+def trigrams(folded):
+    """Trigramas de caracteres do nome sem espaços (pega "Autoposto" x "Auto Posto")."""
+    text = "".join(TOKEN_RE.findall(folded))
+    return frozenset(text[i:i + 3] for i in range(len(text) - 2)) or frozenset((text,))
+
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if b < a:
+            a, b = b, a
+        self.parent[b] = a
+        return True
+
+
+def load_stations(folder=FOLDER_NAME):
+    """Lista (chave, cidade, nome, telefone) de todas as estações salvas."""
+    stations = []
+    for path in city_files(folder):
+        try:
+            city, records = load_city(path)
+        except Exception as e:
+            print(f"⚠️ Ignorando {path}: {e}")
+            continue
+        stations.extend((key, city, record.get("name") or "", record.get("phone")) for key, record in records.items())
+    return stations
+
+
+def resolve(stations, threshold=DEFAULT_THRESHOLD, max_block=MAX_BLOCK):
+    """
+    Agrupa as estações duplicadas. `stations` é uma lista de (chave, cidade, nome, telefone).
+
+    Duas estações caem no mesmo grupo se têm a mesma chave do PlugShare (`id:`/`url:`,
+    mesmo em cidades diferentes), o mesmo telefone válido (E.164) ou, na mesma
+    cidade, nomes parecidos. Para não comparar todos os pares, os nomes
+    são comparados só dentro dos blocos (cidade, palavra), e só pelas palavras
+    mais raras de cada nome. A similaridade é o Dice das palavras pesado pelo
+    IDF (palavras raras, como a marca, valem mais que "posto" ou "hotel"); para
+    os pares que ficam perto do limite, vale o Jaccard dos trigramas do nome.
+
+    Retorna (grupos, motivos): a raiz do grupo de cada estação (índice na lista)
+    e quantas uniões vieram de chave, de telefone e de nome.
+    """
+    size = len(stations)
+    groups = UnionFind(size)
+    reasons = Counter()
+
+    # A mesma estação salva em duas cidades (bbox sobrepostos); chaves `row:` são só posições no arquivo
+    first_with_key = {}
+    for row, (key, _, _, _) in enumerate(stations):
+        if not key.startswith("row:") and groups.union(first_with_key.setdefault(key, row), row):
+            reasons["key"] += 1
+
+    e164, _ = normalize_numbers([phone for _, _, _, phone in stations])
+    first_with_phone = {}
+    for row, number in enumerate(e164):
+        if number is not None:
+            if groups.union(first_with_phone.setdefault(number, row), row):
+                reasons["phone"] += 1
+
+    folded = fold_names([name for _, _, name, _ in stations])
+    tokens = [name_tokens(name) for name in folded]
+    blocks = {}
+    for row, (_, city, _, _) in enumerate(stations):
+        for token in tokens[row]:
+            blocks.setdefault((city, token), []).append(row)
+
+    frequency = Counter()
+    for (_, token), rows in blocks.items():
+        frequency[token] += len(rows)
+    idf = {token: math.log(1 + size / count) for token, count in frequency.items()}
+    weights = [sum(idf[token] for token in row_tokens) for row_tokens in tokens]
+    grams = {}
+
+    def gram(row):
+        if row not in grams:
+            grams[row] = trigrams(folded[row])
+        return grams[row]
+
+    for row in range(size):
+        row_tokens, row_weight, city = tokens[row], weights[row], stations[row][1]
+        # Filtro de prefixo: um par só chega à metade do limite se dividir alguma das palavras
+        # mais raras do nome; as comuns que sobram não pesam o bastante e não geram candidatos
+        remaining, bound = row_weight, row_weight * threshold / 4
+        candidates = set()
+        for token in sorted(row_tokens, key=idf.get, reverse=True):
+            if remaining < bound:
+                break
+            remaining -= idf[token]
+            block = blocks[(city, token)]
+            if len(block) <= max_block:
+                candidates.update(block)
+        for other in candidates:
+            if other <= row:
+                continue
+            shared = row_tokens & tokens[other]
+            score = 2 * sum(idf[token] for token in shared) / (row_weight + weights[other])
+            # Os trigramas só são calculados para quem já chegou perto do limite pelas palavras
+            if threshold / 2 <= score < threshold:
+                a, b = gram(row), gram(other)
+                score = len(a & b) / len(a | b)
+            if score >= threshold and groups.union(row, other):
+                reasons["name"] += 1
+
+    return [groups.find(row) for row in range(size)], reasons
+
+
+def merged_view(stations, roots):
+    """
+    Visão consolidada: um grupo por entidade, do maior para o menor, com id
+    estável e único (a menor chave do grupo qualificada pela cidade,
+    `<cidade>/<chave>`), o nome mais frequente, os telefones, as cidades e as
+    estações originais.
+    """
+    e164, _ = normalize_numbers([phone for _, _, _, phone in stations])
+    members = {}
+    for row, root in enumerate(roots):
+        members.setdefault(root, []).append(row)
+
+    clusters = []
+    for rows in members.values():
+        rows.sort(key=lambda row: (stations[row][0], stations[row][1]))
+        names = Counter(stations[row][2] for row in rows)
+        clusters.append({
+            "cluster": f"{stations[rows[0]][1]}/{stations[rows[0]][0]}",
+            "name": names.most_common(1)[0][0],
+            "phones": sorted({e164[row] for row in rows if e164[row]}),
+            "cities": sorted({stations[row][1] for row in rows}),
+            "stations": [
+                {"key": stations[row][0], "city": stations[row][1], "name": stations[row][2], "phone": stations[row][3]}
+                for row in rows
+            ],
+        })
+    clusters.sort(key=lambda cluster: (-len(cluster["stations"]), cluster["cluster"]))
+    return clusters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agrupa estações duplicadas (mesmo telefone ou nomes parecidos) de todas as cidades.")
+    parser.add_argument("--folder", default=FOLDER_NAME, help="pasta com os arquivos <cidade>.json")
+    parser.add_argument("--output", default=None,
+                        help=f"arquivo de saída (padrão: <folder>/{os.path.basename(CLUSTERS_PATH)})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="similaridade mínima (0 a 1) entre nomes para juntar duas estações")
+    parser.add_argument("--max-block", type=int, default=MAX_BLOCK,
+                        help="ignora como bloco as palavras presentes em mais estações do que isso na mesma cidade")
+    args = parser.parse_args(argv)
+
+    stations = load_stations(args.folder)
+    roots, reasons = resolve(stations, args.threshold, args.max_block)
+    clusters = merged_view(stations, roots)
+    output = args.output or os.path.join(args.folder, os.path.basename(CLUSTERS_PATH))
+    write_json_atomic(output, {"clusters": clusters})
+
+    duplicated = [cluster for cluster in clusters if len(cluster["stations"]) > 1]
+    print(
+        f"🔗 {len(stations)} estações em {len(clusters)} grupos; {len(duplicated)} grupos com duplicatas "
+        f"({reasons['key']} uniões por chave, {reasons['phone']} por telefone, {reasons['name']} por nome)."
+    )
+    for cluster in duplicated[:10]:
+        print(f"   • {cluster['name']}: " + " | ".join(station["name"] for station in cluster["stations"]))
+    print(f"✅ Grupos gravados em `{output}`.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from .cityStore import FOLDER_NAME, city_files, load_city, station_key
+from .phoneNormalize import MISSING, normalize_numbers
+
+# Índice SQLite de todas as estações já visitadas, em qualquer cidade
+INDEX_PATH = os.path.join(FOLDER_NAME, ".station_index.sqlite")
+
+
+class StationIndex:
+    """
+    Índice global das estações já processadas, compartilhado entre cidades.
+
+    Cada estação é indexada pela chave `id:<id>` (ou `url:<url>` quando não tem id),
+    com a URL e o telefone normalizado (E.164) também indexados. Cidades vizinhas
+    devolvem muitas estações em comum; consultar o índice antes de abrir a página
+    ou buscar o JSON de detalhes faz cada estação ser buscada uma vez só.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS stations ("
+            " key TEXT PRIMARY KEY, station_id TEXT, url TEXT, name TEXT, phone TEXT,"
+            " phone_e164 TEXT, phone_status TEXT, city TEXT, source TEXT, updated_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS stations_url ON stations(url)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS stations_phone ON stations(phone_e164)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _row_to_entry(self, row):
+        keys = ("key", "station_id", "url", "name", "phone", "phone_e164", "phone_status", "city", "source", "updated_at")
+        return dict(zip(keys, row))
+
+    def get(self, est, max_missing_age=0):
+        """
+        Procura um estabelecimento do payload (pelo id e, se não achar, pela URL).
+
+        Estações com telefone conhecido são sempre devolvidas; as que ficaram sem
+        telefone só valem por `max_missing_age` segundos, para serem tentadas de novo
+        depois. Retorna a entrada do índice ou None.
+        """
+        key = station_key(est)
+        if key is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT * FROM stations WHERE key = ?", (key,)).fetchone()
+            if row is None and est.get("url"):
+                row = self._db.execute(
+                    "SELECT * FROM stations WHERE url = ? ORDER BY updated_at DESC LIMIT 1", (est["url"],)
+                ).fetchone()
+        if row is None:
+            return None
+
+        entry = self._row_to_entry(row)
+        if entry["phone_status"] != MISSING:
+            return entry
+        if entry["updated_at"] >= time.time() - max_missing_age:
+            return entry
+        return None
+
+    def by_phone(self, phone_e164):
+        """Todas as estações indexadas com o telefone (já em E.164)."""
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM stations WHERE phone_e164 = ?", (phone_e164,)).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    def put(self, city, name, phone, id=None, url=None, source=None, updated_at=None):
+        """Grava (ou substitui) uma estação no índice."""
+        self.put_many([(city, name, phone, id, url, source, updated_at)])
+
+    def put_many(self, stations):
+        """Grava várias estações de uma vez: tuplas (cidade, nome, telefone, id, url, origem, data)."""
+        stations = [station for station in stations if station_key({"id": station[3], "url": station[4]})]
+        if not stations:
+            return
+        e164, statuses = normalize_numbers([station[2] for station in stations])
+        now = time.time()
+        rows = [
+            (
+                station_key({"id": est_id, "url": url}),
+                None if est_id is None else str(est_id),
+                url, name, phone, number, status, city, source, updated_at or now,
+            )
+            for (city, name, phone, est_id, url, source, updated_at), number, status in zip(stations, e164, statuses)
+        ]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO stations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.execute("COMMIT")
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM stations").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def import_cities(index, folder=FOLDER_NAME):
+    """Alimenta o índice com as estações (com id ou URL) já salvas nos arquivos de cidades."""
+    total = 0
+    for path in city_files(folder):
+        city, stations = load_city(path)
+        rows = [
+            (city, record.get("name"), record.get("phone"), record.get("id"), record.get("url"),
+             record.get("source"), record.get("ts"))
+            for key, record in stations.items() if not key.startswith("row:")
+        ]
+        index.put_many(rows)
+        total += len(rows)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstrói o índice global de estações a partir das cidades salvas.")
+    parser.add_argument("--folder", default=FOLDER_NAME)
+    parser.add_argument("--index", default=INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    with StationIndex(args.index) as index:
+        import_cities(index, args.folder)
+        print(f"🗂️ {index.count()} estações no índice `{args.index}`.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+from collections import deque
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+from .runMetrics import metrics
+
+# Marca o documento atual da aba antes de navegar; um documento sem a marca é a página nova
+NAVIGATE_JS = "window.__capturePhonesDone = true; location.assign(arguments[0]);"
+NEW_DOCUMENT_JS = (
+    "return !window.__capturePhonesDone && location.href !== 'about:blank'"
+    " && document.readyState !== 'loading';"
+)
+
+
+class TabPipeline:
+    """
+    Navega em `tabs` abas de um mesmo navegador ao mesmo tempo: enquanto a página de
+    uma aba é lida, as seguintes já estão carregando.
+
+    A navegação é disparada por `location.assign` (não bloqueia como `driver.get`) e
+    cada página é lida pelo mesmo extrator do modo sequencial (ex.:
+    `extract_phone_with_observer`). Os resultados saem na ordem de entrada.
+
+    Com um `pool` (DriverPool), o navegador passou dos limites do pool no meio da
+    cidade: as abas em andamento terminam, o navegador é trocado por um novo
+    (`self.driver`) e as abas são abertas de novo nele.
+    """
+
+    def __init__(self, driver, tabs=3, extract=None, policy=None, timeout=15, pool=None):
+        self.extract = extract
+        self.policy = policy
+        self.timeout = timeout
+        self.tabs = tabs
+        self.pool = pool
+        self._open(driver)
+
+    def _open(self, driver):
+        self.driver = driver
+        self.main_handle = driver.current_window_handle
+        self.handles = [self.main_handle]
+        for _ in range(self.tabs - 1):
+            driver.switch_to.new_window("tab")
+            self.handles.append(driver.current_window_handle)
+        driver.switch_to.window(self.main_handle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _start(self, handle, url):
+        """Dispara a navegação da aba; retorna False se o navegador falhou (o item segue sem aba)."""
+        try:
+            self.driver.switch_to.window(handle)
+            if self.policy is not None:
+                self.policy.apply(self.driver, "detail", handle)
+            self.driver.execute_script(NAVIGATE_JS, url)
+        except WebDriverException as e:
+            metrics.count("tab_failures")
+            print(f"⚠️ Falha na aba ao abrir a página: {e.__class__.__name__}")
+            return False
+        # A navegação não passa pelo `driver.get`: conta a página para o --max-pages do DriverPool
+        count_page = getattr(self.driver, "count_page", None)
+        if count_page is not None:
+            count_page()
+        return True
+
+    def _finish(self, handle):
+        """Espera a página nova da aba terminar de carregar e extrai o telefone."""
+        driver = self.driver
+        driver.switch_to.window(handle)
+        with metrics.stage("page_load"):
+            WebDriverWait(driver, self.timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script(NEW_DOCUMENT_JS)
+            )
+        phone = self.extract(driver)
+        if self.policy is not None:
+            self.policy.measure(driver)
+        return phone
+
+    def pipeline(self, items, url_of):
+        """
+        Devolve pares (item, telefone) na ordem de entrada. Itens em que `url_of`
+        devolve None passam direto, com telefone None, sem ocupar aba; o telefone
+        também vem None se a página da aba falhou.
+
+        Ao receber um par, a aba ativa do navegador é a da página daquele item
+        (ex.: para gravar `driver.page_source`).
+        """
+        free = deque(self.handles)
+        pending = deque()  # (item, aba ou None)
+
+        for item in items:
+            url = url_of(item)
+            if url is None:
+                pending.append((item, None))
+            else:
+                if self.pool is not None and self.pool.should_recycle(self.driver):
+                    while pending:
+                        yield self._pop(pending, free)
+                    self._open(self.pool.renew(self.driver))
+                    free = deque(self.handles)
+                while not free:
+                    yield self._pop(pending, free)
+                handle = free.popleft()
+                if self._start(handle, url):
+                    pending.append((item, handle))
+                else:
+                    free.append(handle)
+                    pending.append((item, None))
+            # Itens sem página à frente da fila não precisam esperar
+            while pending and pending[0][1] is None:
+                yield pending.popleft()[0], None
+
+        while pending:
+            yield self._pop(pending, free)
+
+    def _pop(self, pending, free):
+        item, handle = pending.popleft()
+        if handle is None:
+            return item, None
+        try:
+            return item, self._finish(handle)
+        except WebDriverException as e:
+            # O chamador pode tentar de novo pelo caminho sequencial
+            metrics.count("tab_failures")
+            print(f"⚠️ Falha na aba ao carregar a página: {e.__class__.__name__}")
+            return item, None
+        finally:
+            free.append(handle)
+
+    def close(self):
+        """Fecha as abas extras e volta para a aba original."""
+        for handle in self.handles[1:]:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception:
+                pass
+        self.driver.switch_to.window(self.main_handle)
@@ -0,0 +1,393 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+DEFAULT_LEASE = 120       # segundos que um job fica reservado sem heartbeat
+DEFAULT_MAX_ATTEMPTS = 3  # entregas de um job antes de ir para "dead"
+
+READY = "ready"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+
+def make_job(job_id, queue, payload, attempts, group, worker=None):
+    return {"id": job_id, "queue": queue, "payload": payload, "attempts": attempts, "group": group, "worker": worker}
+
+
+class SQLiteQueue:
+    """
+    Fila de jobs em um arquivo SQLite, para workers na mesma máquina ou com a pasta
+    compartilhada.
+
+    Um job reservado (`lease`) fica com o worker até `lease_until`; o worker estende
+    a reserva com `heartbeat`. Se ele morrer, a reserva vence e o job volta a ser
+    entregue a outro worker, até `max_attempts` entregas (depois vai para "dead").
+    Jobs com o mesmo id são enfileirados uma vez só.
+
+    Um job com reserva vencida e sem tentativas sobrando vai para "dead" dentro do
+    próprio `lease`; quem reservou fica sabendo pelo `on_dead(job)`.
+    """
+
+    def __init__(self, path, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=60)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, queue TEXT, payload TEXT, grp TEXT, status TEXT, attempts INTEGER,"
+            " worker TEXT, lease_until REAL, error TEXT, created_at REAL, updated_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs(queue, status, lease_until, created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_group ON jobs(grp, status)")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def enqueue(self, queue, payload, job_id, group=None):
+        """Enfileira um job; retorna False se já existia um job com o mesmo id."""
+        return self.enqueue_many(queue, [(job_id, payload)], group) == 1
+
+    def enqueue_many(self, queue, jobs, group=None):
+        """Enfileira vários (id, payload) numa transação; retorna quantos eram novos."""
+        now = time.time()
+        rows = [
+            (job_id, queue, json.dumps(payload, ensure_ascii=False), group, READY, now, now)
+            for job_id, payload in jobs
+        ]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO jobs (id, queue, payload, grp, status, attempts, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+                rows,
+            )
+            added = self._db.total_changes - before
+            self._db.execute("COMMIT")
+        return added
+
+    def lease(self, queue, worker, lease_seconds=DEFAULT_LEASE, on_dead=None):
+        """
+        Reserva o próximo job pronto (ou com reserva vencida) da fila; retorna o job ou None.
+        `on_dead(job)` é chamado, depois do commit, para cada job que foi para "dead" no caminho.
+        """
+        now = time.time()
+        job, dead = None, []
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._db.execute(
+                        "SELECT id, payload, grp, attempts FROM jobs WHERE queue = ?"
+                        " AND (status = ? OR (status = ? AND lease_until < ?))"
+                        " ORDER BY created_at LIMIT 1",
+                        (queue, READY, LEASED, now),
+                    ).fetchone()
+                    if row is None:
+                        break
+                    job_id, payload, group, attempts = row
+                    if attempts >= self.max_attempts:
+                        self._db.execute(
+                            "UPDATE jobs SET status = ?, error = COALESCE(error, 'reserva vencida'), updated_at = ?"
+                            " WHERE id = ?",
+                            (DEAD, now, job_id),
+                        )
+                        dead.append(make_job(job_id, queue, json.loads(payload), attempts, group))
+                        continue
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, lease_until = ?, updated_at = ?"
+                        " WHERE id = ?",
+                        (LEASED, worker, now + lease_seconds, now, job_id),
+                    )
+                    job = make_job(job_id, queue, json.loads(payload), attempts + 1, group, worker)
+                    break
+            finally:
+                self._db.execute("COMMIT")
+
+        for dead_job in dead:
+            if on_dead is not None:
+                on_dead(dead_job)
+        return job
+
+    def _update_owned(self, job, sql, params):
+        with self._lock:
+            cursor = self._db.execute(
+                sql + " WHERE id = ? AND worker = ? AND status = ?", params + (job["id"], job["worker"], LEASED)
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job, lease_seconds=DEFAULT_LEASE):
+        """Estende a reserva; retorna False se o job já não pertence a este worker."""
+        now = time.time()
+        return self._update_owned(job, "UPDATE jobs SET lease_until = ?, updated_at = ?", (now + lease_seconds, now))
+
+    def complete(self, job):
+        """Marca o job como concluído; retorna False se a reserva tinha sido perdida."""
+        return self._update_owned(job, "UPDATE jobs SET status = ?, updated_at = ?", (DONE, time.time()))
+
+    def fail(self, job, error):
+        """Devolve o job para a fila (ou para "dead", se esgotou as tentativas)."""
+        status = DEAD if job["attempts"] >= self.max_attempts else READY
+        return self._update_owned(
+            job, "UPDATE jobs SET status = ?, error = ?, updated_at = ?", (status, str(error), time.time())
+        )
+
+    def pending(self, group):
+        """Quantos jobs do grupo ainda não terminaram (prontos ou reservados)."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE grp = ? AND status IN (?, ?)", (group, READY, LEASED)
+            ).fetchone()[0]
+
+    def stats(self):
+        """Contagem de jobs por fila e status: {fila: {status: n}}."""
+        with self._lock:
+            rows = self._db.execute("SELECT queue, status, COUNT(*) FROM jobs GROUP BY queue, status").fetchall()
+        stats = {}
+        for queue, status, count in rows:
+            stats.setdefault(queue, {})[status] = count
+        return stats
+
+
+# Scripts Lua do RedisQueue: cada operação sobre um job roda atômica no servidor.
+
+# Enfileira os jobs que ainda não existem. KEYS: ready, conjunto das filas;
+# ARGV: fila, grupo (ou ""), agora, e pares id, payload. Retorna quantos eram novos.
+ENQUEUE_SCRIPT = """
+local added = 0
+redis.call('SADD', KEYS[2], ARGV[1])
+for i = 4, #ARGV, 2 do
+    local key = 'job:' .. ARGV[i]
+    if redis.call('EXISTS', key) == 0 then
+        local created_at = tonumber(ARGV[3]) + added * 1e-6
+        redis.call('HSET', key, 'queue', ARGV[1], 'payload', ARGV[i + 1], 'status', 'ready',
+                   'attempts', 0, 'created_at', created_at)
+        if ARGV[2] ~= '' then
+            redis.call('HSET', key, 'group', ARGV[2])
+            redis.call('HINCRBY', 'group_pending', ARGV[2], 1)
+        end
+        redis.call('ZADD', KEYS[1], created_at, ARGV[i])
+        added = added + 1
+    end
+end
+return added
+"""
+
+# Reserva: devolve à fila os jobs com reserva vencida e tira o próximo pronto.
+# KEYS: ready, leased, dead; ARGV: agora, vencimento da nova reserva, worker, máximo de tentativas, id da reserva
+# Retorna {id reservado ou "", ids que foram para "dead"...}
+LEASE_SCRIPT = """
+local dead = {}
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+    local key = 'job:' .. id
+    redis.call('ZREM', KEYS[2], id)
+    if redis.call('HGET', key, 'status') == 'leased' then
+        redis.call('HSET', key, 'status', 'ready')
+        redis.call('HDEL', key, 'worker', 'lease_id')
+        redis.call('ZADD', KEYS[1], redis.call('HGET', key, 'created_at'), id)
+    end
+end
+while true do
+    local popped = redis.call('ZPOPMIN', KEYS[1])
+    if #popped == 0 then return {'', unpack(dead)} end
+    local id = popped[1]
+    local key = 'job:' .. id
+    if redis.call('HGET', key, 'status') ~= 'ready' then
+        -- Entrada que sobrou de um job já concluído ou reservado: descarta
+    elseif tonumber(redis.call('HGET', key, 'attempts')) >= tonumber(ARGV[4]) then
+        redis.call('HSET', key, 'status', 'dead')
+        redis.call('SADD', KEYS[3], id)
+        local group = redis.call('HGET', key, 'group')
+        if group then redis.call('HINCRBY', 'group_pending', group, -1) end
+        table.insert(dead, id)
+    else
+        redis.call('HINCRBY', key, 'attempts', 1)
+        redis.call('HSET', key, 'status', 'leased', 'worker', ARGV[3], 'lease_id', ARGV[5])
+        redis.call('ZADD', KEYS[2], ARGV[2], id)
+        return {id, unpack(dead)}
+    end
+end
+"""
+
+# Início comum dos scripts de um job reservado: sai com 0 se a reserva não é mais a
+# do chamador (vencida, devolvida à fila ou entregue a outro worker).
+# KEYS: ready, leased, dead, contador de concluídos; ARGV: id, id da reserva, agora, ...
+OWNED_PRELUDE = """
+local key = 'job:' .. ARGV[1]
+local lease_until = redis.call('ZSCORE', KEYS[2], ARGV[1])
+if not lease_until or tonumber(lease_until) < tonumber(ARGV[3])
+        or redis.call('HGET', key, 'lease_id') ~= ARGV[2] then
+    return 0
+end
+"""
+
+# Estende a reserva. ARGV[4]: novo vencimento
+HEARTBEAT_SCRIPT = OWNED_PRELUDE + """
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+return 1
+"""
+
+# Encerra a reserva. ARGV[4]: novo status (ready, done ou dead); ARGV[5]: erro (ou "")
+FINISH_SCRIPT = OWNED_PRELUDE + """
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('HSET', key, 'status', ARGV[4])
+redis.call('HDEL', key, 'worker', 'lease_id')
+if ARGV[5] ~= '' then redis.call('HSET', key, 'error', ARGV[5]) end
+if ARGV[4] == 'ready' then
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+    return 1
+end
+local group = redis.call('HGET', key, 'group')
+if group then redis.call('HINCRBY', 'group_pending', group, -1) end
+if ARGV[4] == 'dead' then
+    redis.call('SADD', KEYS[3], ARGV[1])
+else
+    redis.call('INCR', KEYS[4])
+end
+return 1
+"""
+
+# Filas conhecidas (um sorted set vazio some do Redis, então a lista não sai das chaves)
+QUEUES_KEY = "queues"
+# Jobs enviados por chamada do ENQUEUE_SCRIPT
+ENQUEUE_CHUNK = 500
+
+
+class RedisQueue:
+    """
+    Mesma interface do `SQLiteQueue`, sobre um Redis (ou servidor compatível) para
+    workers em várias máquinas. Precisa do pacote `redis` (pip install redis).
+
+    Cada fila usa um sorted set de jobs prontos (por ordem de criação) e um de jobs
+    reservados (pelo vencimento da reserva). Enfileirar, reservar, estender e
+    encerrar uma reserva rodam cada um num script Lua atômico; cada reserva tem um
+    id próprio, então um worker cuja reserva venceu não conclui o job de outro.
+    """
+
+    def __init__(self, url, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        try:
+            import redis
+        except ImportError:
+            raise SystemExit("❌ A fila no Redis precisa do pacote `redis`: pip install redis")
+        self.max_attempts = max_attempts
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._enqueue = self._redis.register_script(ENQUEUE_SCRIPT)
+        self._lease = self._redis.register_script(LEASE_SCRIPT)
+        self._heartbeat = self._redis.register_script(HEARTBEAT_SCRIPT)
+        self._finish_lease = self._redis.register_script(FINISH_SCRIPT)
+
+    def close(self):
+        self._redis.close()
+
+    def _keys(self, queue):
+        return [f"queue:{queue}:ready", f"queue:{queue}:leased", f"queue:{queue}:dead", f"queue:{queue}:done"]
+
+    def enqueue(self, queue, payload, job_id, group=None):
+        return self.enqueue_many(queue, [(job_id, payload)], group) == 1
+
+    def enqueue_many(self, queue, jobs, group=None):
+        jobs = list(jobs)
+        added = 0
+        for start in range(0, len(jobs), ENQUEUE_CHUNK):
+            args = [queue, "" if group is None else group, time.time()]
+            for job_id, payload in jobs[start:start + ENQUEUE_CHUNK]:
+                args += [job_id, json.dumps(payload, ensure_ascii=False)]
+            added += self._enqueue(keys=[self._keys(queue)[0], QUEUES_KEY], args=args)
+        return added
+
+    def _job(self, job_id, queue, worker=None):
+        fields = self._redis.hgetall(f"job:{job_id}")
+        job = make_job(job_id, queue, json.loads(fields["payload"]), int(fields["attempts"]),
+                       fields.get("group"), worker)
+        if worker is not None:
+            job["lease_id"] = fields["lease_id"]
+        return job
+
+    def lease(self, queue, worker, lease_seconds=DEFAULT_LEASE, on_dead=None):
+        now = time.time()
+        job_id, *dead = self._lease(keys=self._keys(queue)[:3],
+                                    args=[now, now + lease_seconds, worker, self.max_attempts, uuid.uuid4().hex])
+        if on_dead is not None:
+            for dead_id in dead:
+                on_dead(self._job(dead_id, queue))
+        return self._job(job_id, queue, worker) if job_id else None
+
+    def _owned(self, script, job, *args):
+        return script(keys=self._keys(job["queue"]), args=[job["id"], job["lease_id"], time.time(), *args]) == 1
+
+    def heartbeat(self, job, lease_seconds=DEFAULT_LEASE):
+        return self._owned(self._heartbeat, job, time.time() + lease_seconds)
+
+    def _finish(self, job, status, error=None):
+        return self._owned(self._finish_lease, job, status, "" if error is None else str(error))
+
+    def complete(self, job):
+        return self._finish(job, DONE)
+
+    def fail(self, job, error):
+        return self._finish(job, DEAD if job["attempts"] >= self.max_attempts else READY, error)
+
+    def pending(self, group):
+        return int(self._redis.hget("group_pending", group) or 0)
+
+    def stats(self):
+        stats = {}
+        for queue in sorted(self._redis.smembers(QUEUES_KEY)):
+            ready, leased, dead, done = self._keys(queue)
+            counts = {READY: self._redis.zcard(ready), LEASED: self._redis.zcard(leased),
+                      DONE: int(self._redis.get(done) or 0), DEAD: self._redis.scard(dead)}
+            # Como no SQLiteQueue, só os status com algum job
+            stats[queue] = {status: count for status, count in counts.items() if count}
+        return stats
+
+
+def open_queue(url, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Abre a fila indicada por `url`: `redis://host:6379/0` ou um caminho de arquivo SQLite."""
+    if urlsplit(url).scheme in ("redis", "rediss", "unix"):
+        return RedisQueue(url, max_attempts)
+    return SQLiteQueue(url, max_attempts)
+
+
+class Heartbeat:
+    """
+    Mantém a reserva de um job viva enquanto o bloco roda, numa thread de fundo.
+    `lost` fica True se a reserva for perdida (ex.: o worker ficou parado demais).
+    """
+
+    def __init__(self, queue, job, lease_seconds=DEFAULT_LEASE):
+        self.queue = queue
+        self.job = job
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(self.job, self.lease_seconds):
+                    self.lost = True
+                    return
+            except Exception as e:
+                print(f"⚠️ Falha no heartbeat do job {self.job['id']}: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,12 @@
+import os
+
+from capturephones.atomicFile import write_atomic
+
+
+def test_write_atomic_replaces_file_with_all_parts(tmp_path):
+    path = str(tmp_path / "sub" / "out.bin")
+    write_atomic(path, "antigo")
+    write_atomic(path, [b"novo", "-", b"conteudo"])
+    with open(path, "rb") as f:
+        assert f.read() == b"novo-conteudo"
+    assert not os.path.exists(path + ".tmp")
@@ -0,0 +1,46 @@
+import argparse
+import json
+
+from capturephones import scanner
+from capturephones.benchScan import run_path
+from capturephones.replayHarness import Recorder, ReplayServer
+
+REGION_URL = "https://api.plugshare.com/v3/locations/region?count=500"
+
+
+class FakeDriver:
+    def get_cookies(self):
+        return []
+
+    def quit(self):
+        pass
+
+
+def record_fixtures(folder):
+    with Recorder(str(folder)) as recorder:
+        stations = [{"id": n, "name": f"Posto {n}", "url": f"https://www.plugshare.com/location/{n}"}
+                    for n in range(1, 4)]
+        recorder.record(REGION_URL, json.dumps(stations), "application/json", "region")
+        for est in stations:
+            details = {"id": est["id"], "e164_phone_number": f"+5555322200{est['id']:02d}"}
+            recorder.record(est["url"], json.dumps(details), "application/json", "detail_json")
+
+
+def test_api_path_runs_process_city_against_replay(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(scanner, "setup_driver", lambda headless=False: FakeDriver())
+    record_fixtures(tmp_path / "fixtures")
+    args = argparse.Namespace(extract="observer", tabs=1, workers=2, max_rate=0)
+
+    with ReplayServer(str(tmp_path / "fixtures")) as server:
+        region_urls = [server.local_url(url) for url in server.urls("region")]
+        stations, elapsed, stages, peak = run_path("api", region_urls, args)
+
+    assert stations == 3
+    assert elapsed > 0
+    assert len(stages["region"]) == 1
+    assert len(stages["detail_fetch"]) == 3
+    assert len(stages["save"]) == 3
+    assert set(peak) == {"self", "children"}
+    # A varredura roda numa pasta temporária: nada fica na pasta atual
+    assert not (tmp_path / "numPerCity").exists()
@@ -0,0 +1,59 @@
+import json
+import types
+
+from capturephones.checkpoint import Checkpoint
+from capturephones.cityStore import load_city
+from capturephones.scanner import parse_args, process_city
+from capturephones.stationIndex import StationIndex
+
+BODY = json.dumps([
+    {"id": n, "name": f"Posto {n}", "url": f"https://www.plugshare.com/location/{n}", "score": 9.5}
+    for n in range(1, 6)
+])
+
+
+def test_raw_body_is_stored_and_streamed(tmp_path):
+    checkpoint = Checkpoint("Santa Maria", folder=str(tmp_path))
+    establishments = checkpoint.start(BODY)
+    checkpoint.close()
+
+    assert isinstance(establishments, types.GeneratorType)
+    assert [est["id"] for est in establishments] == [1, 2, 3, 4, 5]
+    with open(checkpoint.path, encoding="utf-8") as f:
+        assert f.read() == BODY
+
+
+def test_resume_streams_the_stored_body(tmp_path):
+    checkpoint = Checkpoint("Santa Maria", folder=str(tmp_path), batch_size=2)
+    establishments = checkpoint.start(BODY.encode("utf-8"))
+    for est in establishments:
+        if est["id"] > 2:
+            break
+        checkpoint.mark(f"id:{est['id']}")
+    checkpoint.flush()
+    checkpoint.close()
+
+    establishments, done = Checkpoint("Santa Maria", folder=str(tmp_path)).resume()
+    assert isinstance(establishments, types.GeneratorType)
+    assert [est["id"] for est in establishments] == [1, 2, 3, 4, 5]
+    assert done == {"id:1", "id:2"}
+
+
+def test_process_city_resumes_from_raw_body(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Telefones já no índice: a retomada não precisa do navegador
+    with StationIndex() as index:
+        for n in range(1, 6):
+            index.put("Santa Maria", f"Posto {n}", "+55 55 3222-0000", id=n,
+                      url=f"https://www.plugshare.com/location/{n}", source="dom")
+    checkpoint = Checkpoint("Santa Maria")
+    checkpoint.start(BODY)
+    checkpoint.mark("id:1")
+    checkpoint.flush()
+    checkpoint.close()
+
+    path = process_city(None, "Santa Maria", None, parse_args([]))
+
+    _, saved = load_city(path)
+    assert [record["id"] for record in saved.values()] == [2, 3, 4, 5]
+    assert not Checkpoint("Santa Maria").exists()
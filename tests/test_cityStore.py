@@ -0,0 +1,61 @@
+from capturephones.cityStore import CityStore, StationDiff
+
+
+def test_renamed_station_is_not_stale(tmp_path):
+    with CityStore("Santa Maria", str(tmp_path)) as store:
+        store.append("Posto Antigo", "+55 55 3222-0000", id=1, url="https://www.plugshare.com/location/1")
+        store.append("Hotel Umberto", "+55 55 3222-1111", id=2, url="https://www.plugshare.com/location/2")
+
+        diff = StationDiff(store.stations())
+        payload = [
+            {"id": 1, "name": "Posto Novo", "url": "https://www.plugshare.com/location/1"},
+            {"id": 2, "name": "Hotel Umberto", "url": "https://www.plugshare.com/location/2"},
+        ]
+        changed = list(diff.filter(payload))
+        assert [est["id"] for est in changed] == [1]
+        assert diff.removed() == []
+
+        # Mesma ordem do scanner: salva de novo o que mudou e só depois marca os removidos
+        store.append("Posto Novo", "+55 55 3222-0000", id=1, url="https://www.plugshare.com/location/1")
+        store.mark_stale(diff.removed())
+        stations = store.stations()
+
+    assert stations["id:1"]["name"] == "Posto Novo"
+    assert not stations["id:1"]["stale"]
+    assert not stations["id:2"]["stale"]
+
+
+def test_missing_station_is_removed(tmp_path):
+    with CityStore("Santa Maria", str(tmp_path)) as store:
+        store.append("Hotel Umberto", "+55 55 3222-1111", id=2, url="https://www.plugshare.com/location/2")
+
+        diff = StationDiff(store.stations())
+        assert list(diff.filter([])) == []
+        assert diff.removed() == ["id:2"]
+
+
+def test_new_coordinates_do_not_mark_live_stations_stale(tmp_path):
+    with CityStore("Santa Maria", str(tmp_path)) as store:
+        store.append("Hotel Umberto", "+55 55 3222-1111", id=2, url="https://www.plugshare.com/location/2")
+
+        diff = StationDiff(store.stations())
+        payload = [{"id": 2, "name": "Hotel Umberto", "url": "https://www.plugshare.com/location/2",
+                    "lat": -29.68, "lng": -53.8}]
+        assert len(list(diff.filter(payload))) == 1
+        assert diff.removed() == []
+
+
+def test_renamed_or_moved_stations_are_changed_but_new_coordinates_are_not(tmp_path):
+    with CityStore("Santa Maria", str(tmp_path)) as store:
+        store.append("Posto A", "+55 55 3222-0001", id=1, url="u1", lat=-29.6, lng=-53.8)
+        store.append("Posto B", "+55 55 3222-0002", id=2, url="u2", lat=-29.6, lng=-53.8)
+        store.append("Posto C", "+55 55 3222-0003", id=3, url="u3")
+
+        diff = StationDiff(store.stations())
+        payload = [
+            {"id": 1, "name": "Posto A Novo", "url": "u1", "lat": -29.6, "lng": -53.8},
+            {"id": 2, "name": "Posto B", "url": "u2", "lat": -29.7, "lng": -53.8},
+            {"id": 3, "name": "Posto C", "url": "u3", "lat": -29.6, "lng": -53.8},
+        ]
+        assert [est["id"] for est in diff.filter(payload)] == [1, 2, 3]
+        assert diff.changed == {"id:1", "id:2"}
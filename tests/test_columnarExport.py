@@ -0,0 +1,20 @@
+from capturephones.columnarExport import build_table
+
+
+def row(city, name, phone):
+    return {"city": city, "station_id": name, "name": name, "phone": phone, "source": "api",
+            "fetched_at": None, "lat": None, "lng": None}
+
+
+def test_export_flags_repeated_numbers_within_each_city():
+    table = build_table([
+        row("Ijuí", "a", "(55) 99663-6076"),
+        row("Ijuí", "b", "+55 55 99663-6076"),
+        row("Ijuí", "c", "Telefone não encontrado"),
+        row("Cruz Alta", "d", "055996636076"),
+    ]).to_pydict()
+
+    assert table["phone"] == ["+5555996636076", "+5555996636076", None, "+5555996636076"]
+    assert table["phone_status"] == ["valid", "valid", "missing", "valid"]
+    # O mesmo número em outra cidade não é repetição
+    assert table["phone_duplicate"] == [False, True, False, False]
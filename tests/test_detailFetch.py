@@ -0,0 +1,111 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from capturephones.detailFetch import DetailFetcher, RateLimiter, create_session
+
+
+class StubServer:
+    """Servidor local de detalhes: `/location/<n>` responde o JSON da estação após um atraso aleatório."""
+
+    def __init__(self, throttle=0, retry_after="0.3"):
+        self.requests = []  # (momento, caminho)
+        self.throttle = throttle  # quantas respostas 429 antes de atender
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests.append((time.monotonic(), self.path))
+                    throttled = server.throttle > 0
+                    server.throttle -= throttled
+                if throttled:
+                    self.send_response(429)
+                    self.send_header("Retry-After", server.retry_after)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                time.sleep(random.uniform(0, 0.03))  # respostas fora de ordem
+                body = json.dumps({"id": int(self.path.rsplit("/", 1)[1])}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, n):
+        return f"{self.base_url}/location/{n}"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+def test_results_come_in_input_order(stub):
+    fetcher = DetailFetcher(create_session(), workers=8, max_rate=0)
+    urls = [stub.url(n) for n in range(40)]
+    assert [details["id"] for details in fetcher.map(urls)] == list(range(40))
+
+
+def test_pipeline_passes_items_without_url(stub):
+    fetcher = DetailFetcher(create_session(), workers=4, max_rate=0)
+    items = [1, None, 2, None, 3]
+    results = list(fetcher.pipeline(items, lambda n: stub.url(n) if n else None))
+    assert [(item, details and details["id"]) for item, details in results] == [
+        (1, 1), (None, None), (2, 2), (None, None), (3, 3),
+    ]
+
+
+def test_max_rate_spaces_out_requests(stub):
+    fetcher = DetailFetcher(create_session(), workers=8, max_rate=20)
+    list(fetcher.map([stub.url(n) for n in range(10)]))
+
+    starts = sorted(moment for moment, _ in stub.requests)
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    # 20 por segundo = uma requisição a cada 50ms, mesmo com 8 workers
+    assert min(gaps) >= 0.04
+    assert starts[-1] - starts[0] >= 9 * 0.05 - 0.02
+
+
+def test_rate_limiter_without_rate_does_not_wait():
+    limiter = RateLimiter(0)
+    start = time.monotonic()
+    for _ in range(100):
+        limiter.wait()
+    assert time.monotonic() - start < 0.05
+
+
+def test_retry_after_pauses_every_worker():
+    stub = StubServer(throttle=1, retry_after="0.3")
+    try:
+        # Com 10/s, a segunda requisição só sairia depois da resposta 429 da primeira
+        fetcher = DetailFetcher(create_session(), workers=4, max_rate=10, backoff=5)
+        assert [details["id"] for details in fetcher.map([stub.url(n) for n in range(4)])] == [0, 1, 2, 3]
+    finally:
+        stub.close()
+
+    (throttled_at, _), *rest = stub.requests
+    # Nenhum worker volta ao servidor antes do Retry-After (e não usou o backoff de 5s)
+    assert len(rest) == 4
+    assert all(0.25 <= moment - throttled_at < 2 for moment, _ in rest)
@@ -0,0 +1,51 @@
+from selenium.common.exceptions import SessionNotCreatedException
+
+from capturephones import scanner
+from capturephones.driverPool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def get(self, url):
+        pass
+
+    def get_log(self, kind):
+        return []
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_browser_is_recycled_mid_lease():
+    pool = DriverPool(FakeDriver, max_pages=2, max_memory_mb=0)
+    with pool.lease() as driver:
+        driver.get("https://www.plugshare.com/location/1")
+        assert pool.recycle_if_needed(driver) is driver
+        driver.get("https://www.plugshare.com/location/2")
+        replacement = pool.recycle_if_needed(driver)
+
+    assert replacement is not driver
+    assert driver.quit_called
+    assert pool.created == 2
+    # O lease devolve o substituto, não o navegador já encerrado
+    assert pool._idle == [replacement]
+
+
+def test_stale_chromedriver_is_resolved_again(monkeypatch):
+    resolved = []
+
+    def resolve_chromedriver(refresh=False):
+        resolved.append(refresh)
+        return "/tmp/chromedriver-novo" if refresh else "/tmp/chromedriver-velho"
+
+    def chrome(service, options):
+        if service.path.endswith("velho"):
+            raise SessionNotCreatedException("This version of ChromeDriver only supports Chrome version 120")
+        return FakeDriver()
+
+    monkeypatch.setattr(scanner, "resolve_chromedriver", resolve_chromedriver)
+    monkeypatch.setattr(scanner.webdriver, "Chrome", chrome)
+    assert isinstance(scanner.setup_driver(headless=True), FakeDriver)
+    assert resolved == [False, True]
@@ -0,0 +1,35 @@
+import pytest
+
+from capturephones.detailCache import DetailCache
+from capturephones.queueWorker import DETAIL_QUEUE, Worker, parse_args
+from capturephones.workQueue import SQLiteQueue
+
+
+def test_worker_rejects_scan_only_options():
+    for option in ("--tabs", "--workers", "--checkpoint-every", "--record", "--profile"):
+        with pytest.raises(SystemExit):
+            parse_args(["work", option, "2"])
+    with pytest.raises(SystemExit):
+        parse_args(["work", "--resume"])
+
+
+def test_dom_detail_job_uses_the_detail_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    url = "https://www.plugshare.com/location/7"
+    with DetailCache() as cache:
+        cache.put(url, "+55 55 3222-7777", None)
+
+    queue = SQLiteQueue(str(tmp_path / "queue.sqlite"))
+    worker = Worker(queue, parse_args(["work"]))
+    try:
+        job = {"id": "city:1/id:7", "queue": DETAIL_QUEUE, "group": "city:1", "attempts": 1,
+               "payload": {"city": "Santa Maria", "id": 7, "name": "Posto 7", "url": url}}
+        worker.handle_detail(job)
+        stations = worker.store("Santa Maria").stations()
+    finally:
+        worker.close()
+
+    # Veio do cache: nenhum navegador foi aberto
+    assert worker.pool.created == 0
+    assert stations["id:7"]["phone"] == "+55 55 3222-7777"
+    assert stations["id:7"]["source"] == "cache"
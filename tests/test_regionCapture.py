@@ -0,0 +1,45 @@
+import json
+
+from capturephones.regionCapture import RegionCapture
+
+
+def response(request_id, url):
+    message = {"message": {"method": "Network.responseReceived",
+                           "params": {"requestId": request_id, "response": {"url": url}}}}
+    return {"message": json.dumps(message)}
+
+
+def finished(request_id):
+    message = {"message": {"method": "Network.loadingFinished", "params": {"requestId": request_id}}}
+    return {"message": json.dumps(message)}
+
+
+class FakeDriver:
+    """Devolve um lote de eventos de rede por leitura do log; o corpo de cada resposta é o próprio requestId."""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+
+    def get_log(self, kind):
+        return self.batches.pop(0) if self.batches else []
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {"body": params["requestId"]}
+
+
+REGION = "https://api.plugshare.com/v3/locations/region?spanLat=1"
+
+
+def test_quiet_waits_for_the_map_to_settle():
+    # A região padrão termina primeiro; a da cidade escolhida chega algumas leituras depois
+    batches = [[response("default", REGION), finished("default")], [], [],
+               [response("city", REGION)], [finished("city")]]
+    capture = RegionCapture(FakeDriver(batches))
+    assert capture.wait_for_latest_body(timeout=5, poll_frequency=0.05, quiet=0.3) == "city"
+
+
+def test_without_quiet_the_first_finished_response_is_taken():
+    batches = [[response("default", REGION), finished("default")], [], [],
+               [response("city", REGION)], [finished("city")]]
+    capture = RegionCapture(FakeDriver(batches))
+    assert capture.wait_for_latest_body(timeout=5, poll_frequency=0.05) == "default"
@@ -0,0 +1,36 @@
+import sys
+import types
+
+from capturephones.regionStream import iter_establishments
+
+BODY = '[{"id": 1, "name": "Posto 1", "url": "u1", "latitude": -29.6}, {"id": 2, "name": "Posto 2", "url": "u2"}]'
+
+
+def test_establishments_are_slimmed():
+    assert list(iter_establishments(BODY)) == [
+        {"id": 1, "name": "Posto 1", "url": "u1", "lat": -29.6},
+        {"id": 2, "name": "Posto 2", "url": "u2"},
+    ]
+
+
+def test_truncated_body_stops_with_a_warning(capsys, monkeypatch):
+    monkeypatch.setitem(sys.modules, "ijson", None)  # força o decodificador da biblioteca padrão
+    assert [est["id"] for est in iter_establishments(BODY[:70])] == [1]
+    assert "inválido" in capsys.readouterr().out
+
+
+def test_ijson_errors_stop_with_a_warning(capsys, monkeypatch):
+    class JSONError(Exception):
+        pass
+
+    class IncompleteJSONError(JSONError):
+        pass
+
+    def items(stream, prefix, use_float=False):
+        yield {"id": 1, "name": "Posto 1", "url": "u1"}
+        raise IncompleteJSONError("parse error: premature EOF")
+
+    ijson = types.SimpleNamespace(JSONError=JSONError, IncompleteJSONError=IncompleteJSONError, items=items)
+    monkeypatch.setitem(sys.modules, "ijson", ijson)
+    assert [est["id"] for est in iter_establishments(BODY[:70])] == [1]
+    assert "premature EOF" in capsys.readouterr().out
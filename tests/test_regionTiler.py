@@ -0,0 +1,81 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from capturephones.detailFetch import create_session
+from capturephones.regionQuery import fetch_region
+from capturephones.regionTiler import tile_region
+from capturephones.runMetrics import metrics
+
+
+class RegionServer:
+    """
+    `locations/region` local: o primeiro pedido leva 429 (Retry-After: 0), o
+    quadrante noroeste responde 500 e os demais um estabelecimento no centro.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests += 1
+                params = dict(parse_qsl(urlsplit(self.path).query))
+                lat, lng = float(params["latitude"]), float(params["longitude"])
+                if server.requests == 1:
+                    self.reply(429, b"", {"Retry-After": "0"})
+                elif lat > 0 and lng < 0:
+                    self.reply(500, b"")
+                else:
+                    self.reply(200, json.dumps([{"id": f"{lat},{lng}", "name": "Posto"}]).encode("utf-8"))
+
+            def reply(self, status, body, headers=()):
+                self.send_response(status)
+                for name, value in dict(headers).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.template = f"http://127.0.0.1:{self.httpd.server_port}/v3/locations/region?count=2"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = RegionServer()
+    yield server
+    server.close()
+
+
+def test_failed_region_is_not_an_empty_region(server):
+    url = server.template + "&latitude=1&longitude=-1&spanLat=1&spanLng=1"
+    assert fetch_region(create_session(), server.template + "&latitude=0&longitude=0&spanLat=1&spanLng=1") == [
+        {"id": "0.0,0.0", "name": "Posto"}
+    ]
+    assert fetch_region(create_session(), url) is None
+
+
+def test_failed_tiles_are_counted(server):
+    metrics.reset()
+    root = [{"id": "a"}, {"id": "b"}]  # resposta saturada (count=2): divide em quatro
+    stations = tile_region(create_session(), server.template, (-1, -1, 1, 1), 2, root_results=root, max_depth=1)
+
+    # O 429 do primeiro tile foi repetido; só o quadrante com 500 ficou de fora
+    assert len(stations) == 2 + 3
+    assert metrics.counters["tiles_failed"] == 1
+    assert metrics.counters["region_retries"] >= 1
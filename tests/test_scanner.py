@@ -0,0 +1,46 @@
+from capturephones.cityStore import CityStore, load_city
+from capturephones.scanner import parse_args, process_city
+from capturephones.stationIndex import StationIndex
+
+
+def test_rescan_with_coordinates_keeps_live_stations(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stations = [
+        (1, "Posto A", "+55 55 3222-0000", "https://www.plugshare.com/location/1"),
+        (2, "Posto B", "+55 55 3222-1111", "https://www.plugshare.com/location/2"),
+    ]
+    # Cidade varrida antes de guardarmos coordenadas, com os telefones já no índice
+    with CityStore("Santa Maria") as store, StationIndex() as index:
+        for est_id, name, phone, url in stations:
+            store.append(name, phone, id=est_id, url=url, source="dom")
+            index.put("Santa Maria", name, phone, id=est_id, url=url, source="dom")
+        store.compact()
+
+    payload = [
+        {"id": est_id, "name": name, "url": url, "lat": -29.68 - est_id / 100, "lng": -53.8}
+        for est_id, name, _, url in stations
+    ]
+    # Tudo vem do índice: o navegador não é usado
+    path = process_city(None, "Santa Maria", payload, parse_args([]))
+
+    _, saved = load_city(path)
+    assert [record["stale"] for record in saved.values()] == [False, False]
+    assert [record["lat"] for record in saved.values()] == [-29.69, -29.7]
+
+
+def test_renamed_station_is_fetched_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    url = "https://www.plugshare.com/location/1"
+    with CityStore("Santa Maria") as store, StationIndex() as index:
+        store.append("Posto Antigo", "+55 55 3222-0000", id=1, url=url, source="dom")
+        index.put("Santa Maria", "Posto Antigo", "+55 55 3222-0000", id=1, url=url, source="dom")
+        store.compact()
+
+    fetched = []
+    monkeypatch.setattr("capturephones.scanner.fetch_phone",
+                        lambda driver, detail_url, *args: (fetched.append(detail_url) or "+55 55 3222-9999", "dom"))
+    path = process_city(None, "Santa Maria", [{"id": 1, "name": "Posto Novo", "url": url}], parse_args([]))
+
+    _, saved = load_city(path)
+    assert fetched == [url]
+    assert saved["id:1"]["phone"] == "+55 55 3222-9999"
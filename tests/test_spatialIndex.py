@@ -0,0 +1,55 @@
+import math
+import random
+
+import pytest
+
+from capturephones.spatialIndex import SpatialIndex, build_index, haversine_km, parse_geo_bbox
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = random.Random(0)
+    # Pontos uniformes na esfera, incluindo as regiões polares
+    return [
+        {"name": str(n), "lat": math.degrees(math.asin(rng.uniform(-1, 1))), "lng": rng.uniform(-180, 180)}
+        for n in range(20000)
+    ]
+
+
+@pytest.fixture(scope="module")
+def index(points, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("geo") / "index.bin")
+    build_index(points, path)
+    with SpatialIndex(path) as index:
+        yield index
+
+
+@pytest.mark.parametrize("lat, lng, km", [
+    (-29.69, -53.8, 300),
+    (60, 10, 2000),
+    (70, 0, 1500),
+    (-60, -170, 3000),
+    (85, 0, 800),
+    (0, 179.9, 500),
+    (10, 10, 15000),
+])
+def test_radius_matches_brute_force(points, index, lat, lng, km):
+    expected = sorted(
+        station["name"] for station in points if haversine_km(lat, lng, station["lat"], station["lng"]) <= km
+    )
+    assert sorted(station["name"] for station in index.radius(lat, lng, km)) == expected
+
+
+@pytest.mark.parametrize("lat, lng", [(-29.69, -53.8), (88, 50), (-89, 0)])
+def test_nearest_matches_brute_force(points, index, lat, lng):
+    expected = sorted(haversine_km(lat, lng, station["lat"], station["lng"]) for station in points)[:15]
+    assert [station["distance_km"] for station in index.nearest(lat, lng, 15)] == [round(d, 3) for d in expected]
+
+
+def test_bbox_across_antimeridian(points, index):
+    south, west, north, east = parse_geo_bbox("-10,170,10,-170")
+    expected = sorted(
+        station["name"] for station in points
+        if south <= station["lat"] <= north and (station["lng"] >= west or station["lng"] <= east)
+    )
+    assert sorted(station["name"] for station in index.bbox(south, west, north, east)) == expected
@@ -0,0 +1,27 @@
+from capturephones.stationDedupe import merged_view, resolve
+
+
+def test_same_key_in_two_cities_is_merged():
+    stations = [
+        ("id:5", "Santa Maria", "Posto Central", None),
+        ("id:5", "Itaara", "Posto Central", None),
+        ("id:6", "Itaara", "Hotel Umberto", None),
+    ]
+    roots, reasons = resolve(stations)
+    clusters = merged_view(stations, roots)
+
+    assert reasons["key"] == 1
+    assert [cluster["cluster"] for cluster in clusters] == ["Itaara/id:5", "Itaara/id:6"]
+    assert clusters[0]["cities"] == ["Itaara", "Santa Maria"]
+
+
+def test_row_keys_are_not_merged_and_ids_are_unique():
+    stations = [
+        ("row:0", "Santa Maria", "Posto Central", None),
+        ("row:0", "Itaara", "Hotel Umberto", None),
+    ]
+    roots, reasons = resolve(stations)
+    clusters = merged_view(stations, roots)
+
+    assert reasons["key"] == 0
+    assert sorted(cluster["cluster"] for cluster in clusters) == ["Itaara/row:0", "Santa Maria/row:0"]
@@ -0,0 +1,112 @@
+from selenium.common.exceptions import WebDriverException
+
+from capturephones import scanner
+from capturephones.detailCache import DetailCache
+from capturephones.driverPool import DriverPool
+from capturephones.replayHarness import Recorder
+from capturephones.tabPipeline import NAVIGATE_JS, NEW_DOCUMENT_JS, TabPipeline
+
+
+class FakeSwitch:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def new_window(self, kind):
+        handle = f"tab{len(self.driver.pages)}"
+        self.driver.pages[handle] = "about:blank"
+        self.driver.current_window_handle = handle
+
+    def window(self, handle):
+        if handle in self.driver.broken:
+            raise WebDriverException("aba travada")
+        self.driver.current_window_handle = handle
+
+
+class FakeDriver:
+    """Navegador falso: cada aba guarda a URL carregada; o telefone é o fim da URL."""
+
+    def __init__(self, broken=()):
+        self.pages = {"main": "about:blank"}
+        self.current_window_handle = "main"
+        self.switch_to = FakeSwitch(self)
+        self.broken = set(broken)
+        self.closed = []
+
+    @property
+    def page_source(self):
+        return f"<html>{self.pages[self.current_window_handle]}</html>"
+
+    def get(self, url):
+        self.pages[self.current_window_handle] = url
+
+    def execute_script(self, script, *args):
+        if script == NAVIGATE_JS:
+            self.pages[self.current_window_handle] = args[0]
+            return None
+        if script == NEW_DOCUMENT_JS:
+            return True
+        raise AssertionError(script)
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def get_log(self, kind):
+        return []
+
+    def close(self):
+        self.closed.append(self.current_window_handle)
+
+    def quit(self):
+        pass
+
+
+def extract(driver):
+    return extract_url(driver.pages[driver.current_window_handle])
+
+
+def test_results_in_order_and_failed_tab_falls_back():
+    driver = FakeDriver(broken={"tab2"})
+    tabs = TabPipeline(driver, tabs=3, extract=extract)
+    items = [f"https://www.plugshare.com/location/{n}" for n in range(1, 6)]
+
+    results = list(tabs.pipeline(items, lambda url: url))
+    tabs.close()
+
+    assert [item for item, _ in results] == items
+    # A aba travada não derruba o fluxo: o item volta sem telefone para o caminho sequencial
+    assert any(phone is None for _, phone in results)
+    assert all(phone == extract_url(item) for item, phone in results if phone is not None)
+    assert driver.current_window_handle == "main"
+
+
+def extract_url(url):
+    return "+55 55 3222-" + url.rsplit("/", 1)[1].zfill(4)
+
+
+def test_tab_navigations_count_towards_max_pages():
+    pool = DriverPool(FakeDriver, max_pages=3, max_memory_mb=0)
+    with pool.lease() as driver:
+        tabs = TabPipeline(driver, tabs=2, extract=extract)
+        list(tabs.pipeline([f"https://www.plugshare.com/location/{n}" for n in range(4)], lambda url: url))
+        tabs.close()
+    assert pool.created == 1
+    # Passou de max_pages só com navegações das abas: o navegador foi reciclado
+    assert pool._idle == []
+
+
+def test_tab_pages_are_recorded_and_cached(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(scanner.EXTRACTORS, "observer", extract)
+    payload = [
+        {"id": n, "name": f"Posto {n}", "url": f"https://www.plugshare.com/location/{n}"} for n in range(1, 4)
+    ]
+    args = scanner.parse_args(["--tabs", "2"])
+
+    with Recorder(str(tmp_path / "fixtures")) as recorder:
+        scanner.process_city(FakeDriver(), "Santa Maria", payload, args, recorder)
+
+    bodies = list((tmp_path / "fixtures" / "bodies").iterdir())
+    assert len(bodies) == 3
+    assert sorted(body.read_text() for body in bodies) == [f"<html>{est['url']}</html>" for est in payload]
+    with DetailCache() as cache:
+        assert cache.get(payload[0]["url"])["phone"] == extract_url(payload[0]["url"])
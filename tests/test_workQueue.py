@@ -0,0 +1,60 @@
+import time
+
+from capturephones.workQueue import DEAD, DONE, LEASED, READY, SQLiteQueue
+
+
+def open_queue(tmp_path, max_attempts=3):
+    return SQLiteQueue(str(tmp_path / "queue.sqlite"), max_attempts=max_attempts)
+
+
+def test_lease_is_exclusive_and_in_order(tmp_path):
+    queue = open_queue(tmp_path)
+    assert queue.enqueue_many("details", [("a", {"n": 1}), ("b", {"n": 2}), ("a", {"n": 3})], group="city") == 2
+
+    first = queue.lease("details", "w1", lease_seconds=60)
+    second = queue.lease("details", "w2", lease_seconds=60)
+    assert (first["id"], first["payload"], first["attempts"]) == ("a", {"n": 1}, 1)
+    assert second["id"] == "b"
+    assert queue.lease("details", "w3", lease_seconds=60) is None
+    assert queue.stats() == {"details": {LEASED: 2}}
+
+
+def test_expired_lease_is_redelivered(tmp_path):
+    queue = open_queue(tmp_path)
+    queue.enqueue("details", {}, "a", group="city")
+
+    lost = queue.lease("details", "w1", lease_seconds=0)
+    time.sleep(0.01)
+    job = queue.lease("details", "w2", lease_seconds=60)
+    assert (job["id"], job["worker"], job["attempts"]) == ("a", "w2", 2)
+
+    # O worker antigo perdeu a reserva: não conclui nem estende o job de outro
+    assert not queue.heartbeat(lost)
+    assert not queue.complete(lost)
+    assert queue.complete(job)
+    assert queue.pending("city") == 0
+    assert queue.stats() == {"details": {DONE: 1}}
+
+
+def test_failed_job_is_retried_until_max_attempts(tmp_path):
+    queue = open_queue(tmp_path, max_attempts=2)
+    queue.enqueue("details", {}, "a", group="city")
+
+    assert queue.fail(queue.lease("details", "w1"), "erro 1")
+    assert queue.stats() == {"details": {READY: 1}}
+    assert queue.fail(queue.lease("details", "w1"), "erro 2")
+    assert queue.stats() == {"details": {DEAD: 1}}
+    assert queue.lease("details", "w1") is None
+
+
+def test_expired_job_without_attempts_goes_dead_and_is_reported(tmp_path):
+    queue = open_queue(tmp_path, max_attempts=1)
+    queue.enqueue("details", {"city": "Santa Maria"}, "a", group="city")
+    queue.lease("details", "w1", lease_seconds=0)
+    time.sleep(0.01)
+
+    dead = []
+    assert queue.lease("details", "w2", on_dead=dead.append) is None
+    assert [(job["id"], job["payload"], job["group"]) for job in dead] == [("a", {"city": "Santa Maria"}, "city")]
+    assert queue.pending("city") == 0
+    assert queue.stats() == {"details": {DEAD: 1}}